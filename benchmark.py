@@ -0,0 +1,138 @@
+#!/usr/bin/env python
+
+#imports
+import argparse    # for argument parsing
+import os          # for removing the temporary config
+import random      # for the synthetic sequences
+import sys
+import tempfile    # for the temporary config
+import time        # for the wall clock time
+import tracemalloc # for the peak memory
+import pylignments # the aligner under test
+
+ALPHABET = "ACGT"
+ALGORITHMS = ["nw", "sw", "ef"]
+ENGINES = ["iterative", "recursive", "tiled"]
+PHASES = ["parse", "init", "fill", "traceback", "output"]
+
+# synthetic pairs, every generator returns (seq1, seq2) of about the given length and only uses rand
+def randomPair(rand, length):
+    # two unrelated sequences
+    return ("".join(rand.choice(ALPHABET) for _ in range(length)),
+            "".join(rand.choice(ALPHABET) for _ in range(length)))
+
+def repetitivePair(rand, length):
+    # tandem repeats of a short unit with a different number of copies, a worst case for the co-optimal paths
+    unit = "".join(rand.choice(ALPHABET) for _ in range(rand.randint(2, 6)))
+    copies = length // len(unit) + 1
+    return ((unit * copies)[:length], (unit * copies)[:max(1, length - len(unit))])
+
+def nearIdenticalPair(rand, length):
+    # the second sequence is the first one with about 1% substitutions, insertions and deletions
+    seq1 = "".join(rand.choice(ALPHABET) for _ in range(length))
+    seq2 = []
+    for char in seq1:
+        if(rand.random() >= 0.01):
+            seq2.append(char)
+            continue
+        kind = rand.randint(0, 2)
+        if(kind == 0):
+            seq2.append(rand.choice(ALPHABET))             # substitution
+        elif(kind == 1):
+            seq2.append(char + rand.choice(ALPHABET))      # insertion
+        # deletion otherwise
+    return (seq1, "".join(seq2))
+
+KINDS = {"random": randomPair, "repetitive": repetitivePair, "near-identical": nearIdenticalPair}
+
+class benchmark:
+    """Runs the aligner on synthetic pairs and reports the time, the cells per second and the peak memory of every run"""
+    # constructor
+    def __init__(self, args):
+        self.args = args
+        # the scores are read from a config without sequences, like the batch mode does
+        handle, self.configPath = tempfile.mkstemp(suffix=".txt")
+        os.write(handle, ("alg: nw\nmatch: " + args.match + "\nmismatch: " + args.mismatch + "\nindel: " + args.indel + "\n").encode())
+        os.close(handle)
+
+    def pairs(self):
+        # yields (kind, length, seq1, seq2), the same seed always gives the same pairs
+        rand = random.Random(self.args.seed)
+        for kind in self.args.kinds:
+            for length in self.args.lengths:
+                seq1, seq2 = KINDS[kind](rand, length)
+                yield (kind, length, seq1, seq2)
+
+    def runOne(self, seq1, seq2, algorithm, engine, traced=False):
+        # aligns one pair and returns (seconds, peak bytes, stats of the aligner). tracemalloc slows down
+        # every allocation, so the peak memory is taken from a separate traced run. Shared memory and memory maps are not traced
+        conf = pylignments.config(self.configPath, sequences=False).forPair(seq1, seq2)
+        conf.algorithm = algorithm
+        conf.engine = engine
+        conf.maxAlignments = self.args.max_alignments
+        conf.workers = self.args.workers
+        conf.tile = self.args.tile
+        conf.profile = True
+        if(traced):
+            tracemalloc.start()
+        start = time.perf_counter()
+        align = pylignments.aligner(conf)
+        if(self.args.format == "spreadsheet"):
+            align.printSpreadSheet(os.devnull)             # the output is part of the run, but not kept
+        else:
+            align.printAlignments(os.devnull)
+        seconds = time.perf_counter() - start
+        peak = 0
+        if(traced):
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+        return (seconds, peak, align.stats)
+
+    def run(self, out):
+        # one tab separated line per kind, length, algorithm and engine
+        out.write("\t".join(["kind", "length", "algorithm", "engine", "seconds", "cells/s", "peak MiB"] + PHASES + ["cells", "alignments", "bytes"]) + "\n")
+        for kind, length, seq1, seq2 in self.pairs():
+            for algorithm in self.args.algorithms:
+                for engine in self.args.engines:
+                    if(engine == "recursive" and length > self.args.recursive_limit):
+                        continue                           # the recursive engine runs into the recursion limit
+                    best = None
+                    for _ in range(self.args.repeat):
+                        result = self.runOne(seq1, seq2, algorithm, engine)
+                        if(best is None or result[0] < best[0]):
+                            best = result                  # the fastest run is the least disturbed one
+                    seconds, _, stats = best
+                    peak = self.runOne(seq1, seq2, algorithm, engine, traced=True)[1]
+                    fields = [kind, str(length), algorithm, engine, format(seconds, ".6f"),
+                              format(stats["cells"] / max(stats["fill"], 1e-9), ".0f"), format(peak / 2**20, ".2f")]
+                    fields += [format(stats[phase], ".6f") for phase in PHASES]
+                    fields += [str(stats["cells"]), str(stats["alignments"]), str(stats["bytes"])]
+                    out.write("\t".join(fields) + "\n")
+                    out.flush()
+
+    def close(self):
+        os.remove(self.configPath)
+
+#main
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmarks pylignments on synthetic random, repetitive and near-identical sequence pairs")
+    parser.add_argument("--lengths", type=int, nargs="+", default=[100, 500, 1000], help="sequence lengths (default: 100 500 1000)")
+    parser.add_argument("--kinds", choices=sorted(KINDS), nargs="+", default=["random", "repetitive", "near-identical"], help="kinds of pairs (default: all)")
+    parser.add_argument("--algorithms", choices=ALGORITHMS, nargs="+", default=ALGORITHMS, help="algorithms (default: nw sw ef)")
+    parser.add_argument("--engines", choices=ENGINES, nargs="+", default=["iterative", "recursive"], help="engines (default: iterative recursive)")
+    parser.add_argument("--match", default="+1", help="match score (default: +1)")
+    parser.add_argument("--mismatch", default="-1", help="mismatch score (default: -1)")
+    parser.add_argument("--indel", default="-2", help="indel score (default: -2)")
+    parser.add_argument("--max-alignments", type=int, default=1, metavar="N", help="co-optimal alignments enumerated per run (default: 1)")
+    parser.add_argument("--recursive-limit", type=int, default=200, metavar="L", help="longest sequences run with the recursive engine (default: 200)")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes of the tiled engine (default: number of cpus)")
+    parser.add_argument("--tile", type=int, default=256, help="tile size of the tiled engine (default: 256)")
+    parser.add_argument("--format", choices=["alignment", "spreadsheet"], default="alignment", help="output written to the null device, the spreadsheet grows with the matrix (default: alignment)")
+    parser.add_argument("--repeat", type=int, default=1, help="runs per case, the fastest one is reported (default: 1)")
+    parser.add_argument("--seed", type=int, default=1, help="seed of the synthetic pairs (default: 1)")
+    args = parser.parse_args()
+    bench = benchmark(args)
+    try:
+        bench.run(sys.stdout)
+    finally:
+        bench.close()
@@ -2,9 +2,52 @@
 
 #imports
 import argparse    # for argument parsing
+import collections # for deque
+import concurrent.futures # for the batch process pool
+import contextlib  # for the profiling phases
+import copy        # for copying configs
+import functools   # for the profiling decorator
+import hashlib     # for the keys of the result cache
+import heapq       # for the best hits of a search
+import json        # for the records of the result cache
+import itertools   # for islice
+from multiprocessing import shared_memory # for the tiled engine
+import os          # for the number of cpus
 import re          # for regex
+import sqlite3     # for the result cache
 import numpy as np # for numpy arrays
 import sys
+import tempfile    # for the disk backed matrices
+import time        # for the profiling phases
+import zlib        # for the records of the result cache
+
+# path bits of a cell, a set bit means the cell can be reached from the respective neighbor
+DIAG = 1
+UP = 2
+LEFT = 4
+
+# marks of the backtrace path, printed as charBacktracePart and charBacktraceEnd
+TRACE_PART = 1
+TRACE_END = 2
+
+# bytes of a row block (tile) of the disk backed tables, the tables are flushed and scanned block by block
+TILE_BYTES = 64 * 2**20
+
+# co-optimal alignments enumerated per pair in batch mode and per hit in search mode, degenerate pairs (e.g. poly-A) have exponentially many of them
+BATCH_MAX_ALIGNMENTS = 100
+
+# score of impossible states in the affine (gotoh) matrices, low enough to never win and to still fit into int32
+NEG = -2**30
+
+# decorator of aligner methods, the run time of the method is added to the given phase of aligner.stats
+def profiled(name):
+    def decorate(method):
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            with self.phase(name):
+                return method(self, *args, **kwargs)
+        return wrapper
+    return decorate
 
 #classes
 
@@ -16,10 +59,52 @@ class aligner:
         self.row = len(conf.seq1)   # store length of sequence1
         self.col = len(conf.seq2)   # store length of sequence2
         self.sequences = []         # will contain the aligned sequences
-        self.path = dict()
-        row1 = self.row + 1
+        self.spans = []             # ((start row, start col), (end row, end col)) of every aligned sequence
+        self.stats = None           # phase times and counters with config.profile, see phase() and count()
+        self.currentPhase = None
+        if(conf.profile):
+            self.stats = {"parse": conf.parseTime, "init": 0.0, "fill": 0.0, "traceback": 0.0, "output": 0.0,
+                          "cells": 0, "alignments": 0, "bytes": 0, "cacheHits": 0, "cacheMisses": 0}
+        self.cached = False         # True if the result was read from config.cache, there are no matrices then
+        self.code1 = conf.encode(conf.seq1)  # sequences as index arrays into the substitution matrix
+        self.code2 = conf.encode(conf.seq2)
+        if(conf.affine() and (conf.scoreOnly or conf.linear or conf.band is not None or conf.seed is not None)):
+            raise Exception("Affine gaps are only implemented for the full matrix")
+        if(conf.cache == ""):
+            self.align()
+            return
+        cache = openCache(conf.cache, conf.cacheSize)
+        key = cache.key(conf)
+        if(cache.load(key, self)):
+            self.cached = True      # score, end points and alignments are restored, nothing is computed
+            self.count("cacheHits", 1)
+            self.count("alignments", len(self.sequences))
+            return
+        self.count("cacheMisses", 1)
+        self.align()
+        cache.store(key, self)
+
+    def align(self):
+        # computes the score and the alignments with the configured mode and algorithm
+        conf = self.config
+        if(conf.seed is not None):
+            self.calcSeeded()       # local hits around exact seeds, only the cells near the hits are computed
+            return
+        if(conf.scoreOnly):
+            self.calcScoreOnly()    # only two rows are kept, there are no matrices and no alignments
+            return
+        if(conf.linear):
+            self.calcLinear()       # one optimal alignment in linear space, there are no matrices
+            return
+        if(conf.band is not None):
+            self.calcBanded()       # one optimal alignment, only a band around the diagonal is computed
+            return
         col1 = self.col + 1
-        self.matrix = np.array([[[0,0]]*col1]*row1)  # create our matrix
+        self.tiles = []                                        # disk backed tables, see table()
+        self.shared = []                                       # shared memory of the tiled engine, see table()
+        self.tileRows = max(1, TILE_BYTES // (4 * col1))       # rows of one tile of the score matrix
+        self.scores = self.table(np.int32, shared=True)        # create our score matrix
+        self.path = self.table(np.uint8, shared=True)          # path bits (DIAG, UP, LEFT) of every cell
          # run the respective routine depending on the configured algorithm
         if(conf.algorithm == "nw" or conf.algorithm == "NW"):
             self.needlemanWunsch()
@@ -30,92 +115,272 @@ class aligner:
         else:
             raise Exception("Algorithm \"" + conf.algorithm  + "\" not implemented")
 
+    # profiling
+    @contextlib.contextmanager
+    def phase(self, name):
+        # adds the time spent in the block to self.stats[name]. Nested phases are part of the outer one,
+        # so the recursive and the mutually calling routines are counted once
+        if(self.stats is None or self.currentPhase is not None):
+            yield
+            return
+        self.currentPhase = name
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stats[name] += time.perf_counter() - start
+            self.currentPhase = None
+
+    def count(self, name, value):
+        # adds value to the counter self.stats[name]
+        if(self.stats is not None):
+            self.stats[name] += value
+
+    def printStats(self, out=sys.stderr):
+        # one "name: value" line per phase and counter
+        for name, value in self.stats.items():
+            if(isinstance(value, float)):
+                out.write(name + ": " + format(value, ".6f") + "s\n")
+            else:
+                out.write(name + ": " + str(value) + "\n")
+
+    # tables
+    @profiled("init")
+    def table(self, dtype, shared=False):
+        # zero initialized (row+1)x(col+1) table. with config.scratch it is a memory map of a temporary file in that directory,
+        # so matrices larger than the memory can be filled and backtraced, only the touched pages are resident.
+        # shared tables of the tiled engine are placed in shared memory, so the workers can fill them
+        shape = (self.row + 1, self.col + 1)
+        if(shared and self.config.engine == "tiled" and not self.config.affine()):
+            if(self.config.scratch != ""):
+                raise Exception("The tiled engine keeps the matrices in shared memory and cannot use a scratch directory")
+            memory = shared_memory.SharedMemory(create=True, size=max(1, int(np.prod(shape)) * np.dtype(dtype).itemsize))
+            self.shared.append(memory)
+            table = np.ndarray(shape, dtype=dtype, buffer=memory.buf)
+            table[:] = 0
+            return table
+        if(self.config.scratch == ""):
+            return np.zeros(shape, dtype=dtype)
+        table = np.memmap(tempfile.TemporaryFile(dir=self.config.scratch), dtype=dtype, mode="w+", shape=shape)  # the file is removed on close
+        self.tiles.append(table)
+        return table
+
+    def syncTables(self, row):
+        # writes the finished tile of the disk backed tables back, so the dirty pages do not pile up
+        if(self.tiles and (row + 1) % self.tileRows == 0):
+            for table in self.tiles:
+                table.flush()
+
     # needlemanWunsch part
+    @profiled("init")
     def initNeedlemanWunsch(self):
         col = self.col     # set local n 
         row = self.row     # set local m
         col1 = col+1       # stupid stuff bc of typeError during concatenation
         row1 = row+1       #  ...
         value = 0
-        #self.path = np.array([[[[0]*col1]*row1]*col1]*row1)    # create 4 dimmensional array to safe baths 
         for x in range(0,row1):                      # initialize first row
-            self.matrix[x][0] = [value,1]            # 1 is the "set"-flag
-            self.path[(x,0,x+1,0)] = 1               # set the pathing
+            self.scores[x][0] = value
+            if(x > 0):
+                self.path[x][0] = UP                 # set the pathing, the boundary can only be reached by going up...
             value = value + self.config.indel        # alter value for the next field
         value = 0                  
         for x in range(0,col1):                      # initialize first column
-            self.matrix[0][x] = [value,1] 
-            self.path[(0,x,0,x+1)] = 1
+            self.scores[0][x] = value
+            if(x > 0):
+                self.path[0][x] = LEFT               # ...or left
             value = value + self.config.indel
     
     def needlemanWunsch(self):
         self.initNeedlemanWunsch()              # initialize marices (scores & path)
-        self.recursive_calc(self.row,self.col)  # calculate actual scores
+        self.calc()                             # calculate actual scores
         self.backtrace()                        # backtrace, store aligned sequences in self.sequences and store best score
     
-    def needlemanWunsch_iterative(self):
-        print("not implemented")
-        
+    # fill the score matrix with the configured engine
+    @profiled("fill")
+    def calc(self):
+        if(self.config.affine() or self.config.engine != "iterative"):
+            self.count("cells", self.row * self.col)    # the iterative engine counts its rows in fillRow
+        if(self.config.affine()):
+            if(self.config.engine != "iterative"):
+                raise Exception("Affine gaps are only implemented for the iterative engine")
+            self.affine_calc()
+        elif(self.config.engine == "recursive"):
+            self.filled = np.zeros(self.scores.shape, dtype=bool)  # the "set"-flags of the recursive engine
+            self.filled[0,:] = True                                # the boundaries are set by the init routines
+            self.filled[:,0] = True
+            if(self.row > 0 and self.col > 0):                     # otherwise the boundaries are the whole matrix
+                self.recursive_calc(self.row, self.col)
+        elif(self.config.engine == "iterative"):
+            self.iterative_calc()
+        elif(self.config.engine == "tiled"):
+            self.tiled_calc()
+        else:
+            raise Exception("Engine \"" + self.config.engine + "\" not implemented")
+
+    def iterative_calc(self):
+        # fill the matrix row by row, every row is computed with a few vector operations
+        for row in range(1, self.row + 1):
+            subst = self.config.substitution[self.code1[row-1]][self.code2] # diagonal scores of this row
+            self.path[row,1:] = self.fillRow(self.scores[row-1], self.scores[row], subst) # save the paths of the row
+            self.syncTables(row)
+
+    def fillRow(self, prev, cur, subst, local=None):
+        # computes cur[1:] from the previous row and cur[0], returns the path bits of the computed cells
+        # local defaults to the configured algorithm, global sub problems of smith waterman pass False
+        if(local is None):
+            local = self.config.algorithm == "sw" or self.config.algorithm == "SW"
+        self.count("cells", len(prev) - 1)
+        return fillRow(prev, cur, subst, self.config.indel, local)
+
+    def tiled_calc(self):
+        # fills the matrix in tiles of config.tile x config.tile cells with a process pool. A tile is started as soon as the
+        # tiles above and to the left are done, so the tiles of an anti-diagonal run at the same time. The workers share the
+        # score and path matrices and read only the row above and the column left of their tile
+        tile = self.config.tile
+        workers = self.config.workers if self.config.workers is not None else (os.cpu_count() or 1)
+        local = self.config.algorithm == "sw" or self.config.algorithm == "SW"
+        names = (self.shared[0].name, self.shared[1].name)
+        pool = None
+        try:
+            rowBlocks = [(row, min(row + tile, self.row + 1)) for row in range(1, self.row + 1, tile)]
+            colBlocks = [(col, min(col + tile, self.col + 1)) for col in range(1, self.col + 1, tile)]
+            if(not rowBlocks or not colBlocks):
+                return                                         # a sequence is empty, the boundaries are the whole matrix
+            pool = concurrent.futures.ProcessPoolExecutor(max_workers=workers, initializer=initTileWorker,
+                                                          initargs=(names, self.scores.shape, self.code1, self.code2, self.config.substitution, self.config.indel, local))
+            running = dict()                                   # future -> block
+            done = set()
+            def submit(block):
+                running[pool.submit(fillTile, rowBlocks[block[0]], colBlocks[block[1]])] = block
+            submit((0, 0))
+            while(running):
+                finished, _ = concurrent.futures.wait(running, return_when=concurrent.futures.FIRST_COMPLETED)
+                for future in finished:
+                    future.result()                            # raises the exception of a failed tile
+                    block = running.pop(future)
+                    done.add(block)
+                    right = (block[0], block[1] + 1)           # the right neighbor also needs the tile above it
+                    if(right[1] < len(colBlocks) and (right[0] == 0 or (right[0] - 1, right[1]) in done)):
+                        submit(right)
+                    below = (block[0] + 1, block[1])           # the lower neighbor also needs the tile left of it
+                    if(below[0] < len(rowBlocks) and (below[1] == 0 or (below[0], below[1] - 1) in done)):
+                        submit(below)
+        finally:
+            if(pool is not None):
+                pool.shutdown(cancel_futures=True)         # also after a failed tile or an interrupt
+            for memory in self.shared:
+                memory.unlink()                            # the name is not needed anymore, our mapping stays valid
+
     def recursive_calc(self, row, col):
-        if(self.matrix[row-1][col-1][1] == 0):
+        if(self.filled[row-1][col-1] == 0):
             self.recursive_calc(row-1,col-1)   # calculate diagonal if not set
-        if(self.matrix[row-1][col][1] == 0):
+        if(self.filled[row-1][col] == 0):
             self.recursive_calc(row-1,col)     # calculate left neighbor
-        if(self.matrix[row][col-1][1] == 0):
+        if(self.filled[row][col-1] == 0):
             self.recursive_calc(row,col-1)     # calculate upper neighbor
         self.calcScore(row,col)
 
     def calcScore(self,row,col):
         # calculate all possible incoming scores
-        pDiagonalScore = 0
-        if(self.config.seq1[row-1] == self.config.seq2[col-1]):
-            pDiagonalScore = self.matrix[row-1][col-1][0] + self.config.match
-        else:
-            pDiagonalScore = self.matrix[row-1][col-1][0] + self.config.mismatch
-        pUpperScore = self.matrix[row][col-1][0] + self.config.indel
-        pLeftScore  = self.matrix[row-1][col][0] + self.config.indel
+        pDiagonalScore = self.scores[row-1][col-1] + self.config.substitution[self.code1[row-1]][self.code2[col-1]]
+        pUpperScore = self.scores[row][col-1] + self.config.indel
+        pLeftScore  = self.scores[row-1][col] + self.config.indel
+        self.filled[row][col] = 1                          # raise the set flag
         #
-        # now check scores and set the current score at (m,n) to the highest. (+ raise the set flag and save paths)
+        # now check scores and set the current score at (m,n) to the highest. (+ save paths)
         if(pDiagonalScore >= pUpperScore and pDiagonalScore >= pLeftScore):
             # if the algorithm is smith waterman and the score is below 0
             if((self.config.algorithm == "sw" or self.config.algorithm == "SW") and pDiagonalScore < 0):
-                self.matrix[row][col] = [0,1]              # set score to 0, no path is saved
+                self.scores[row][col] = 0                  # set score to 0, no path is saved
             else:
-                self.matrix[row][col] = [pDiagonalScore,1] # else save score and path
-                self.path[(row,col,row-1,col-1)] = 1
-                # self.path[(row-1,col-1,row,col)] = 1
+                self.scores[row][col] = pDiagonalScore     # else save score and path
+                self.path[row][col] |= DIAG
         if(pUpperScore >= pDiagonalScore and pUpperScore >= pLeftScore):
             # if the algorithm is smith waterman and the score is below 0
             if((self.config.algorithm == "sw" or self.config.algorithm == "SW") and pUpperScore < 0):
-                self.matrix[row][col] = [0,1]              # set score to 0, no path is saved
+                self.scores[row][col] = 0                  # set score to 0, no path is saved
             else:
-                self.matrix[row][col] = [pUpperScore,1]    # else save score and path
-                self.path[(row,col,row,col-1)] = 1
-                # self.path[(row,col-1,row,col)] = 1
+                self.scores[row][col] = pUpperScore        # else save score and path
+                self.path[row][col] |= LEFT
         if(pLeftScore >= pDiagonalScore and pLeftScore >= pUpperScore):
             if((self.config.algorithm == "sw" or self.config.algorithm == "SW") and pLeftScore < 0):
-                self.matrix[row][col] = [0,1]
+                self.scores[row][col] = 0
             else:
-                self.matrix[row][col] = [pLeftScore,1]
-                self.path[(row,col,row-1,col)] = 1
-                # self.path[(row-1,col,row,col)] = 1
+                self.scores[row][col] = pLeftScore
+                self.path[row][col] |= UP
     
+    # affine gaps (gotoh)
+    def affine_calc(self):
+        # three matrices: M ends with a match or mismatch, X with a gap in sequence 2 (up), Y with a gap in sequence 1 (left).
+        # self.scores holds the best of the three and self.path the states reaching it (DIAG for M, UP for X, LEFT for Y)
+        gapOpen = self.config.gapOpen
+        gapExtend = self.config.gapExtend
+        self.scoresM = self.table(np.int32)
+        self.scoresX = self.table(np.int32)
+        self.scoresY = self.table(np.int32)
+        for scores in (self.scoresM, self.scoresX, self.scoresY):
+            scores[0,:] = NEG                                                 # only the boundaries need to be initialized,
+            scores[:,0] = NEG                                                 # every other cell is written by fillAffineRow
+        if(self.config.algorithm == "nw" or self.config.algorithm == "NW"):
+            self.scoresM[0][0] = 0
+            self.scoresX[1:,0] = gapOpen + np.arange(self.row) * gapExtend   # the boundaries are single gaps
+            self.scoresY[0,1:] = gapOpen + np.arange(self.col) * gapExtend
+        else:
+            self.scoresM[0,:] = 0                                             # alignments may start anywhere on the boundaries
+            self.scoresM[:,0] = 0
+        np.maximum(np.maximum(self.scoresM[0], self.scoresX[0]), self.scoresY[0], out=self.scores[0])
+        np.maximum(np.maximum(self.scoresM[:,0], self.scoresX[:,0]), self.scoresY[:,0], out=self.scores[:,0])
+        tables = (self.scoresM, self.scoresX, self.scoresY, self.scores)
+        prev = [table[0].astype(np.int64) for table in tables]               # rolling rows, avoid overflows in the intermediate results
+        cur = [np.empty(self.col + 1, dtype=np.int64) for table in tables]
+        offset = np.arange(self.col + 1, dtype=np.int64) * gapExtend
+        for row in range(1, self.row + 1):
+            for rolling, table in zip(cur, tables):
+                rolling[0] = table[row][0]                                    # column 0 is the boundary
+            subst = self.config.substitution[self.code1[row-1]][self.code2] # diagonal scores of this row
+            self.path[row,1:] = self.fillAffineRow(prev, cur, subst, offset)
+            for rolling, table in zip(cur, tables):
+                table[row,1:] = rolling[1:]
+            prev, cur = cur, prev
+            self.syncTables(row)
+
+    def fillAffineRow(self, prev, cur, subst, offset):
+        # computes cur[1:] of the three matrices and their best from the previous rows, returns the path bits of the computed cells
+        gapOpen = self.config.gapOpen
+        gapExtend = self.config.gapExtend
+        local = self.config.algorithm == "sw" or self.config.algorithm == "SW"
+        prevM, prevX, prevY, prevBest = prev
+        M, X, Y, best = cur
+        np.add(prevBest[:-1], subst, out=M[1:])
+        np.maximum(prevM[1:], prevY[1:], out=X[1:])
+        X[1:] += gapOpen
+        np.maximum(X[1:], prevX[1:] + gapExtend, out=X[1:])
+        # Y[k] = max(M[k-1] + open, X[k-1] + open, Y[k-1] + extend) = max over j<k of max(M[j],X[j]) + open + (k-1-j)*extend
+        chain = np.maximum.accumulate(np.maximum(M, X) - offset)
+        np.add(chain[:-1], offset[:-1], out=Y[1:])
+        Y[1:] += gapOpen
+        np.maximum(M[1:], X[1:], out=best[1:])
+        np.maximum(best[1:], Y[1:], out=best[1:])
+        if(local):
+            np.maximum(best[1:], 0, out=best[1:])              # smith waterman never goes below 0
+        bits = (M[1:] == best[1:]) * np.uint8(DIAG)
+        bits |= (X[1:] == best[1:]) * np.uint8(UP)
+        bits |= (Y[1:] == best[1:]) * np.uint8(LEFT)
+        # impossible states are clamped to NEG so that they fit into the int32 matrices
+        np.maximum(M, NEG, out=M)
+        np.maximum(X, NEG, out=X)
+        np.maximum(Y, NEG, out=Y)
+        return bits
+
     # end free
+    @profiled("init")
     def initEndFree(self):
-        col = self.col     # set local n
-        row = self.row     # set local m
-        col1 = col+1       # stupid stuff bc of typeError during concatenation while initializing the matrices below
-        row1 = row+1       #  ...
-        # self.path = np.array([[[[0]*col1]*row1]*col1]*row1)    # create 4 dimmensional array to safe baths
-        #self.matrix = np.array([[[0,0]]*col1]*row1)  # create our matrix
-        for x in range(0,row1):                      # initialize first row
-            self.matrix[x][0] = [0,1]                # 1 is the "set"-flag
-        for x in range(0,col1):                      # initialize first column
-            self.matrix[0][x] = [0,1]
+        pass                                     # the score matrix is already initialized with zeros
     
     def endFree(self):
         self.initEndFree()                       # initialize score matrix and path matrix
-        self.recursive_calc(self.row, self.col)  # calculate scores in the matrix, this uses the self.config.algorithm setting to determine the MO
+        self.calc()                              # calculate scores in the matrix, this uses the self.config.algorithm setting to determine the MO
         self.backtrace()                         # backtrace uses the algorithm value to determine it's MO
   
     # smith waterman
@@ -124,12 +389,491 @@ class aligner:
         
     def smithWaterman(self):
         self.initSmithWaterman()                 # initialize score and path matrices
-        self.recursive_calc(self.row, self.col)  # calculate scores recursively
+        self.calc()                              # calculate scores
         self.backtrace()                         # backtrace optimal paths, store alignments and score
   
+    # score only
+    @profiled("fill")
+    def calcScoreOnly(self):
+        # computes self.score and self.end with two rolling rows, the shorter sequence is laid along the rows
+        algorithm = self.config.algorithm.lower()
+        if(algorithm not in ("nw", "sw", "ef")):
+            raise Exception("Algorithm \"" + self.config.algorithm  + "\" not implemented")
+        swap = self.col > self.row                     # the matrix is transposed if sequence2 is the longer one
+        if(swap):
+            code1, code2 = self.code2, self.code1
+            substitution = self.config.substitution.T  # the matrix may be asymmetric
+        else:
+            code1, code2 = self.code1, self.code2
+            substitution = self.config.substitution
+        rows = len(code1)
+        cols = len(code2)
+        indel = self.config.indel
+        if(algorithm == "nw"):
+            prev = np.arange(cols + 1, dtype=np.int64) * indel  # first row of needleman wunsch
+        else:
+            prev = np.zeros(cols + 1, dtype=np.int64)           # first row of end free and smith waterman
+        cur = np.empty_like(prev)
+        # the best cell is the first one backtrace would find: row by row for smith waterman,
+        # right boundary before lower boundary for end free. (0,0) comes first if nothing beats 0
+        best = (0, ((0,0) if algorithm == "sw" else -1, (0,0)))
+        for row in range(1, rows + 1):
+            cur[0] = row * indel if algorithm == "nw" else 0
+            subst = substitution[code1[row-1]][code2]
+            self.fillRow(prev, cur, subst)
+            if(algorithm == "sw"):
+                col = int(cur.argmax())
+                point = (col, row) if swap else (row, col)
+                best = self.betterEnd(best, int(cur[col]), point, point)
+            elif(algorithm == "ef" and not swap and row < rows):
+                best = self.betterEnd(best, int(cur[cols]), (row, cols), row)         # right boundary
+            elif(algorithm == "ef" and swap):
+                best = self.betterEnd(best, int(cur[cols]), (cols, row), cols + row)  # lower boundary
+            prev, cur = cur, prev
+        # prev now holds the last row
+        if(algorithm == "nw"):
+            self.score = int(prev[cols])
+            self.end = (self.row, self.col)
+        elif(algorithm == "sw"):
+            self.score, self.end = best[0], best[1][1]
+        else:
+            if(swap and cols > 0):                                                    # empty boundaries are skipped
+                col = int(prev[:cols].argmax())                                       # right boundary
+                best = self.betterEnd(best, int(prev[col]), (col, rows), col)
+            elif(not swap and rows > 0):
+                col = int(prev.argmax())                                              # lower boundary
+                best = self.betterEnd(best, int(prev[col]), (rows, col), rows + col)
+            self.score, self.end = best[0], best[1][1]
+
+    def betterEnd(self, best, score, point, rank):
+        # best is (score, (rank, point)), ties are decided by the lower rank
+        if(score > best[0] or (score == best[0] and rank < best[1][0])):
+            return (score, (rank, point))
+        return best
+
+    # linear space alignment (hirschberg)
+    def calcLinear(self):
+        # stores one optimal alignment in self.sequences, sw and ef align the window between start and end globally
+        self.calcScoreOnly()                           # score and end point in linear space
+        if(self.config.algorithm == "nw" or self.config.algorithm == "NW"):
+            self.start = (0, 0)
+        else:
+            self.start = self.findStart()
+        seq1 = []                                      # pieces of the aligned sequences
+        seq2 = []
+        self.hirschberg(self.start[0], self.end[0], self.start[1], self.end[1], seq1, seq2)
+        self.sequences.append(("".join(seq1), "".join(seq2)))
+        self.spans.append((self.start, self.end))
+        self.count("alignments", 1)
+
+    @profiled("traceback")
+    def findStart(self):
+        # runs a global alignment backwards from self.end and returns the first cell reaching self.score,
+        # for end free that cell has to lie on the upper or left boundary
+        endFree = self.config.algorithm == "ef" or self.config.algorithm == "EF"
+        row, col = self.end
+        code1 = self.code1[:row][::-1]
+        code2 = self.code2[:col][::-1]
+        indel = self.config.indel
+        prev = np.arange(col + 1, dtype=np.int64) * indel
+        cur = np.empty_like(prev)
+        for r in range(0, row + 1):
+            if(r > 0):
+                cur[0] = r * indel
+                subst = self.config.substitution[code1[r-1]][code2]
+                self.fillRow(prev, cur, subst, local=False)
+                prev, cur = cur, prev
+            if(endFree and r < row):
+                if(prev[col] == self.score):                   # left boundary
+                    return (row - r, 0)
+            else:
+                hits = np.flatnonzero(prev == self.score)
+                if(len(hits) > 0):
+                    return (row - r, col - int(hits[0]))
+        raise Exception("Cannot find the start of the alignment")   # this should never happen, the end was found with the same scores
+
+    def lastRow(self, code1, code2):
+        # last row of the global alignment of code1 and code2, computed with two rolling rows
+        indel = self.config.indel
+        prev = np.arange(len(code2) + 1, dtype=np.int64) * indel
+        cur = np.empty_like(prev)
+        for row in range(1, len(code1) + 1):
+            cur[0] = row * indel
+            subst = self.config.substitution[code1[row-1]][code2]
+            self.fillRow(prev, cur, subst, local=False)
+            prev, cur = cur, prev
+        return prev
+
+    @profiled("traceback")
+    def hirschberg(self, row0, row1, col0, col1, seq1, seq2):
+        # globally aligns seq1[row0:row1] and seq2[col0:col1], appends the aligned pieces to seq1 and seq2
+        rows = row1 - row0
+        cols = col1 - col0
+        if(rows <= 1 or cols <= 1 or rows * cols <= 4096):
+            self.alignSmall(row0, row1, col0, col1, seq1, seq2)   # small enough for a full matrix
+            return
+        mid = row0 + rows // 2
+        code2 = self.code2[col0:col1]
+        forward = self.lastRow(self.code1[row0:mid], code2)
+        backward = self.lastRow(self.code1[mid:row1][::-1], code2[::-1])
+        split = col0 + int((forward + backward[::-1]).argmax())   # the optimal path crosses the middle row here
+        self.hirschberg(row0, mid, col0, split, seq1, seq2)
+        self.hirschberg(mid, row1, split, col1, seq1, seq2)
+
+    def alignSmall(self, row0, row1, col0, col1, seq1, seq2):
+        # full matrix global alignment of a small window, follows diagonal before up before left
+        code1 = self.code1[row0:row1]
+        code2 = self.code2[col0:col1]
+        indel = self.config.indel
+        bits = np.zeros((len(code1) + 1, len(code2) + 1), dtype=np.uint8)
+        bits[0,1:] = LEFT
+        bits[1:,0] = UP
+        prev = np.arange(len(code2) + 1, dtype=np.int64) * indel
+        cur = np.empty_like(prev)
+        for row in range(1, len(code1) + 1):
+            cur[0] = row * indel
+            subst = self.config.substitution[code1[row-1]][code2]
+            bits[row,1:] = self.fillRow(prev, cur, subst, local=False)
+            prev, cur = cur, prev
+        s1 = []
+        s2 = []
+        row = len(code1)
+        col = len(code2)
+        while(row > 0 or col > 0):
+            if(bits[row][col] & DIAG):
+                s1.append(self.config.seq1[row0+row-1])
+                s2.append(self.config.seq2[col0+col-1])
+                row = row - 1
+                col = col - 1
+            elif(bits[row][col] & UP):
+                s1.append(self.config.seq1[row0+row-1])
+                s2.append("-")
+                row = row - 1
+            else:
+                s1.append("-")
+                s2.append(self.config.seq2[col0+col-1])
+                col = col - 1
+        s1.reverse()
+        s2.reverse()
+        seq1.extend(s1)
+        seq2.extend(s2)
+
+    # banded alignment
+    def calcBanded(self):
+        # stores one optimal alignment in self.sequences, only cells with bandLow <= col-row <= bandHigh are computed.
+        # with config.bandCheck the band is doubled as long as an alignment leaving the band could score higher
+        if(self.config.algorithm == "sw" or self.config.algorithm == "SW"):
+            raise Exception("Banded alignment is only implemented for needleman wunsch and end free")
+        if(self.config.band == "auto"):
+            self.band = max(16, abs(self.col - self.row))     # a few gaps more than the length difference
+        else:
+            self.band = int(self.config.band)
+        while(True):
+            self.fillBand()
+            self.findBandEnd()
+            self.bandTraceback()
+            covered = self.bandLow <= -self.row and self.bandHigh >= self.col   # the band is the whole matrix
+            if(not self.config.bandCheck or covered or self.score >= self.outsideBound()):
+                self.count("alignments", 1)                      # only the alignment of the last band is kept
+                return
+            self.band = max(1, self.band * 2)
+            self.sequences = []
+            self.spans = []
+
+    def outsideBound(self):
+        # upper bound of the score of an alignment with a cell outside the band, every diagonal move scores at most best
+        if(self.config.indel > 0):
+            return sys.maxsize                               # gaps raise the score, there is no bound
+        if(self.row == 0 or self.col == 0):
+            return 0
+        best = int(self.config.substitution[np.unique(self.code1)][:, np.unique(self.code2)].max())
+        if(self.config.algorithm == "ef" or self.config.algorithm == "EF"):
+            # an end free alignment touching the diagonal d > bandHigh or d < bandLow has at most min(row, col-d) or
+            # min(row+d, col) diagonal moves, its gaps can only lower the score
+            moves = max(min(self.row, self.col - self.bandHigh - 1), min(self.row + self.bandLow - 1, self.col), 0)
+            return max(best, 0) * moves
+        # a needleman wunsch alignment runs from the diagonal 0 to the diagonal col-row. To touch the diagonal d > bandHigh
+        # it needs left >= d left moves and left-(col-row) up moves, to touch d < bandLow up >= -d up moves and up+(col-row)
+        # left moves. The score is linear in the number of gaps, so it is largest at the fewest or the most of them
+        indel = self.config.indel
+        diff = self.col - self.row
+        bound = -sys.maxsize
+        d = self.bandHigh + 1
+        if(d <= self.col):
+            for left in (d, self.col):
+                bound = max(bound, best * (self.col - left) + indel * (2 * left - diff))
+        d = self.bandLow - 1
+        if(-d <= self.row):
+            for up in (-d, self.row):
+                bound = max(bound, best * (self.row - up) + indel * (2 * up + diff))
+        return bound
+
+    @profiled("fill")
+    def fillBand(self):
+        # fills the band row by row. Row r of the band arrays holds the columns r+bandLow ... r+bandHigh,
+        # so the diagonal neighbor has the same index in the previous row and the upper one the next index
+        nw = self.config.algorithm == "nw" or self.config.algorithm == "NW"
+        indel = self.config.indel
+        self.bandLow = min(0, self.col - self.row) - self.band   # the band follows the diagonal from (0,0) to (row,col)
+        self.bandHigh = max(0, self.col - self.row) + self.band
+        width = self.bandHigh - self.bandLow + 1
+        self.count("cells", self.row * width)
+        self.bandScores = np.full((self.row + 1, width), NEG, dtype=np.int32)
+        self.bandPath = np.zeros((self.row + 1, width), dtype=np.uint8)
+        offset = np.arange(width, dtype=np.int64) * indel
+        cols = self.bandLow + np.arange(width)                   # columns of row 0
+        valid = (cols >= 0) & (cols <= self.col)
+        self.bandScores[0][valid] = cols[valid] * indel if nw else 0
+        if(nw):
+            self.bandPath[0][valid & (cols > 0)] = LEFT
+        for row in range(1, self.row + 1):
+            cols = cols + 1
+            valid = (cols >= 0) & (cols <= self.col)
+            prev = self.bandScores[row-1].astype(np.int64)      # avoid overflows in the intermediate results
+            if(self.col > 0):
+                subst = self.config.substitution[self.code1[row-1]][self.code2[np.clip(cols - 1, 0, self.col - 1)]]
+            else:
+                subst = np.zeros(width, dtype=np.int64)          # sequence 2 is empty, only column 0 is valid
+            diag = prev + subst                                  # coming from the diagonal
+            up = np.full(width, NEG, dtype=np.int64)            # coming from the cell above
+            up[:-1] = prev[1:] + indel
+            best = np.maximum(diag, up)
+            best[~valid | (cols == 0)] = NEG
+            boundary = -row - self.bandLow                       # index of column 0
+            if(boundary >= 0 and boundary < width):
+                best[boundary] = row * indel if nw else 0
+            # resolve the chain of left moves like fillRow does
+            cur = np.maximum.accumulate(best - offset) + offset
+            cur[~valid] = NEG
+            np.maximum(cur, NEG, out=cur)
+            left = np.full(width, NEG, dtype=np.int64)
+            left[1:] = cur[:-1] + indel
+            inner = valid & (cols > 0)
+            bits = (inner & (diag == cur)) * np.uint8(DIAG)
+            bits |= (inner & (left == cur)) * np.uint8(LEFT)
+            bits |= (inner & (up == cur)) * np.uint8(UP)
+            if(nw and boundary >= 0 and boundary < width):
+                bits[boundary] = UP
+            self.bandScores[row] = cur
+            self.bandPath[row] = bits
+
+    def bandScore(self, row, col):
+        # score of a cell, NEG outside of the band
+        k = col - row - self.bandLow
+        if(k < 0 or k >= self.bandScores.shape[1]):
+            return NEG
+        return int(self.bandScores[row][k])
+
+    def findBandEnd(self):
+        # (row,col) for needleman wunsch, the first best boundary cell within the band for end free. On ties this can differ
+        # from the end point of backtrace, which may pick a tied cell outside the band. The score is the same
+        if(self.config.algorithm == "nw" or self.config.algorithm == "NW"):
+            self.end = (self.row, self.col)
+            self.score = self.bandScore(self.row, self.col)
+            return
+        best = (0, (0, 0))
+        for row in range(0, self.row):                           # right boundary
+            if(self.bandScore(row, self.col) > best[0]):
+                best = (self.bandScore(row, self.col), (row, self.col))
+        for col in range(0, self.col + 1):                       # lower boundary
+            if(self.bandScore(self.row, col) > best[0]):
+                best = (self.bandScore(self.row, col), (self.row, col))
+        self.score, self.end = best
+
+    @profiled("traceback")
+    def bandTraceback(self):
+        # follows the first path in the order of iterAlignments (left before diagonal before up) and stores the alignment
+        nw = self.config.algorithm == "nw" or self.config.algorithm == "NW"
+        seq1 = []
+        seq2 = []
+        row, col = self.end
+        while(not ((nw and row == 0 and col == 0) or (not nw and (row == 0 or col == 0)))):
+            k = col - row - self.bandLow
+            bits = self.bandPath[row][k]
+            if(bits & LEFT):
+                seq1.append("-")
+                seq2.append(self.config.seq2[col-1])
+                col = col - 1
+            elif(bits & DIAG):
+                seq1.append(self.config.seq1[row-1])
+                seq2.append(self.config.seq2[col-1])
+                row = row - 1
+                col = col - 1
+            else:
+                seq1.append(self.config.seq1[row-1])
+                seq2.append("-")
+                row = row - 1
+        seq1.reverse()
+        seq2.reverse()
+        self.sequences.append(("".join(seq1), "".join(seq2)))
+        self.spans.append(((row, col), self.end))
+
+    # seed and extend
+    def calcSeeded(self):
+        # smith waterman heuristic for long sequences: every exact match of config.seed residues is extended to both sides
+        # with a gapped x-drop alignment. The best scoring hits are stored like the co-optimal alignments of smith waterman
+        if(not (self.config.algorithm == "sw" or self.config.algorithm == "SW")):
+            raise Exception("Seed and extend is only implemented for smith waterman")
+        if(self.config.scoreOnly or self.config.linear or self.config.band is not None):
+            raise Exception("Seed and extend cannot be combined with score only, linear or banded alignment")
+        if(self.config.indel >= 0):
+            raise Exception("Seed and extend needs a negative indel score")
+        k = self.config.seed
+        self.seedLists = (self.code1.tolist(), self.code2.tolist(), self.config.substitution.tolist())   # see xdropExtend
+        hits = dict()                                      # span -> (score, ops)
+        covered = set()                                    # aligned residue pairs (row, col) of the hits so far
+        for row, col in self.seeds():
+            if((row, col) in covered):
+                continue                                   # the seed is part of a hit that was already extended
+            # the left side is extended backwards. Like smith waterman it takes the longest of the equally good starts
+            left = self.xdropExtend(row, col, -1, longest=True)
+            right = self.xdropExtend(row + k, col + k, 1)
+            with self.phase("traceback"):
+                leftOps = self.xdropTraceback(left)        # from the start of the hit towards the seed
+                rightOps = self.xdropTraceback(right)[::-1] # from the seed to the end of the hit
+            score, start, end, ops = self.trimHit((row - left[0][1], col - left[0][2]), leftOps + [DIAG] * k + rightOps)
+            cell = start
+            for op in ops:
+                if(op == DIAG):
+                    covered.add(cell)
+                cell = (cell[0] + (op != LEFT), cell[1] + (op != UP))
+            if(score > 0 and (start, end) not in hits):
+                hits[(start, end)] = (score, ops)
+        self.score = max([hit[0] for hit in hits.values()], default=0)
+        if(self.score == 0):
+            self.end = (0, 0)                              # smith waterman reports an empty alignment at (0,0)
+            self.sequences.append(("", ""))
+            self.spans.append(((0, 0), (0, 0)))
+        else:
+            best = sorted([span for span, hit in hits.items() if hit[0] == self.score], key=lambda span: span[1]) # end points row by row
+            if(self.config.maxAlignments > 0):
+                best = best[:self.config.maxAlignments]
+            self.end = best[0][1]
+            for span in best:
+                self.sequences.append(self.opsAlignment(span[0], hits[span][1]))
+                self.spans.append(span)
+        self.count("alignments", len(self.sequences))
+
+    @profiled("fill")
+    def seeds(self):
+        # (row, col) of every exact match of config.seed residues, row by row. sequence 2 is indexed by its k-mers
+        k = self.config.seed
+        index = dict()                                     # k-mer -> columns
+        text2 = self.code2.tobytes()
+        for col in range(0, self.col - k + 1):
+            index.setdefault(text2[col:col+k], []).append(col)
+        text1 = self.code1.tobytes()
+        seeds = []
+        for row in range(0, self.row - k + 1):
+            for col in index.get(text1[row:row+k], ()):
+                seeds.append((row, col))
+        return seeds
+
+    @profiled("fill")
+    def xdropExtend(self, row, col, step, longest=False):
+        # global alignment of the residues after the cell (row, col) (step 1) or before it (step -1), row by row. Only the
+        # columns scoring at least the best score so far minus config.xDrop are kept, the extension stops when a row has
+        # none of them. returns ((best score, row, col), rows), rows[r] = (first column, scores, path bits) of the kept
+        # cells of row r. the best cell is the first one row by row, or the last one if longest is set.
+        # the kept part of a row is only a few cells wide, so the cells are computed one by one on plain lists
+        indel = self.config.indel
+        xDrop = self.config.xDrop
+        codes1, codes2, substitution = self.seedLists
+        rows1 = self.row - row if step > 0 else row
+        cols2 = self.col - col if step > 0 else col
+        base1 = row - 1 if step > 0 else row             # residue of extension row r is codes1[base1 + step*r]
+        base2 = col - 1 if step > 0 else col
+        cols = min(cols2, xDrop // -indel)               # row 0 only has left moves
+        rows = [(0, [c * indel for c in range(0, cols + 1)], [0] + [LEFT] * cols)]
+        best = (0, 0, 0)
+        cells = 0
+        for r in range(1, rows1 + 1):
+            low, prev, _ = rows[-1]
+            end = low + len(prev)                        # first column without a cell above
+            subst = substitution[codes1[base1 + step*r]]
+            scores = []
+            bits = []
+            left = NEG
+            for c in range(low, cols2 + 1):
+                k = c - low
+                diag = prev[k-1] + subst[codes2[base2 + step*c]] if k >= 1 and k <= len(prev) else NEG
+                up = prev[k] + indel if k < len(prev) else NEG
+                left = left + indel
+                score = max(diag, up, left)
+                if(c >= end and score < best[0] - xDrop):
+                    break                                # only the chain of left moves continues from here
+                bits.append((DIAG if diag == score else 0) | (UP if up == score else 0) | (LEFT if left == score else 0))
+                scores.append(score)
+                if(score > best[0] or (longest and score == best[0])):
+                    best = (score, r, c)
+                left = score
+            cells += len(scores)
+            alive = [k for k in range(0, len(scores)) if scores[k] >= best[0] - xDrop]
+            if(not alive):
+                break
+            for k in range(alive[0], alive[-1] + 1):
+                if(scores[k] < best[0] - xDrop):
+                    scores[k] = NEG                      # dropped cells inside the kept columns
+            rows.append((low + alive[0], scores[alive[0]:alive[-1]+1], bits[alive[0]:alive[-1]+1]))
+        self.count("cells", cells)
+        return (best, rows)
+
+    def xdropTraceback(self, extension):
+        # path bits from the best cell of an extension back to (0,0), follows diagonal before up before left
+        (score, row, col), rows = extension
+        ops = []
+        while(row > 0 or col > 0):
+            low, _, bits = rows[row]
+            bit = bits[col - low]
+            if(bit & DIAG):
+                row, col = row - 1, col - 1
+                ops.append(DIAG)
+            elif(bit & UP):
+                row = row - 1
+                ops.append(UP)
+            else:
+                col = col - 1
+                ops.append(LEFT)
+        return ops
+
+    def trimHit(self, start, ops):
+        # the best scoring part of the moves ops from the cell start, so the hit is a local alignment that does not have to
+        # contain its seed. returns (score, start, end, ops), ties are decided like smith waterman: first end, longest start
+        moves = np.array(ops, dtype=np.uint8)
+        rows = start[0] + np.concatenate(([0], np.cumsum(moves != LEFT)))   # cell before and after every move
+        cols = start[1] + np.concatenate(([0], np.cumsum(moves != UP)))
+        diag = moves == DIAG
+        gains = np.full(len(moves), self.config.indel, dtype=np.int64)
+        gains[diag] = self.config.substitution[self.code1[rows[:-1][diag]], self.code2[cols[:-1][diag]]]
+        prefix = np.concatenate(([0], np.cumsum(gains)))
+        lowest = np.minimum.accumulate(prefix)
+        last = int((prefix - lowest).argmax())                                  # end of the best part
+        first = int(np.flatnonzero(prefix[:last+1] == lowest[last])[0])         # longest start of it
+        return (int(prefix[last] - prefix[first]), (int(rows[first]), int(cols[first])), (int(rows[last]), int(cols[last])), ops[first:last])
+
+    def opsAlignment(self, start, ops):
+        # aligned sequences of the moves ops (DIAG, UP, LEFT) starting at the cell start
+        row, col = start
+        s1 = []
+        s2 = []
+        for op in ops:
+            if(op == DIAG):
+                s1.append(self.config.seq1[row])
+                s2.append(self.config.seq2[col])
+                row, col = row + 1, col + 1
+            elif(op == UP):
+                s1.append(self.config.seq1[row])
+                s2.append("-")
+                row = row + 1
+            else:
+                s1.append("-")
+                s2.append(self.config.seq2[col])
+                col = col + 1
+        return ("".join(s1), "".join(s2))
+
     # general methods        
-    # print the matrices with predefined style characters from config
-    def printMatrix(self, backtrace, out):
+    # print the matrices with predefined style characters from config, window ((row0,row1),(col0,col1)) limits the rows and columns
+    def printMatrix(self, backtrace, out, window=None):
         # get the configured characters for visulization
         right = self.config.charPathRight
         down = self.config.charPathDown
@@ -137,192 +881,253 @@ class aligner:
         con = self.config.charSpacerCon
         hSpacer = self.config.charHSpacer
         vSpacer = self.config.charVSpacer
-        head = "  "+"{:>6s}"*len(self.config.seq2) # head string
-        out.write(head.format(*self.config.seq2) + '\n')      # print head string
-        x = len(self.config.seq2)+1                
-        out.write(" " + con + (hSpacer*5 + con )*x + '\n')                     # print spacer, x is the number of fields
-        for row in range(0,len(self.config.seq1)+1): # for every line   
-            line1 = " " + vSpacer                  # line1 contains the scores and path flags and indicators
-            try: 
-                line2 = self.config.seq1[row] + con  # line2 is the spacer and contains path indicators
-            except IndexError:                     # if we're in the last line
-                line2 = " " + con
-            for col in range(0, len(self.config.seq2)+1):                  # for every column in the line
-                if(backtrace == 1 or self.bpath[row][col] == self.config.charBacktraceEnd):
-                    line1 = line1 + "{:4d}".format(self.matrix[row][col][0]) + self.bpath[row][col] # score field + backtrace path
-                else:
-                    line1 = line1 + "{:4d} ".format(self.matrix[row][col][0])    # score field                                                    
-                if( (row,col+1,row,col) in  self.path.keys()):                   # if path exist
-                    line1 = line1 + right
-                else:
-                    line1 = line1 + vSpacer
-                line2 = line2 + hSpacer*2                       # first part of the spacer
-                if( (row+1,col,row,col) in self.path.keys()):   # middle part of the spacer, the path indicator
-                    line2 = line2 + down
-                else:
-                    line2 = line2 + hSpacer
-                line2 = line2 + hSpacer*2                       # third part of the spacer
-                if( (row+1,col+1,row,col) in self.path.keys()):
-                    line2 = line2 + diag
-                else: 
-                    line2 = line2 + con
-            out.write(line1 + '\n')
-            out.write(line2 + '\n')
+        chars = (" ", self.config.charBacktracePart, self.config.charBacktraceEnd)  # characters of the backtrace marks
+        if(window is None):
+            window = ((0, self.row + 1), (0, self.col + 1))
+        row0, row1 = max(0, window[0][0]), min(self.row + 1, window[0][1])
+        col0, col1 = max(0, window[1][0]), min(self.col + 1, window[1][1])
+        cols = np.arange(col0, col1)
+        inner = cols < self.col                                  # columns with a right neighbor
+        first = self.config.seq2[col0-1] if col0 > 0 else " "   # the label of a column is left of it, column 0 has none
+        out.write(" " + first + "".join(["{:>6s}".format(self.config.seq2[col-1]) for col in range(col0 + 1, col1)]) + '\n')  # print head string
+        out.write(" " + con + (hSpacer*5 + con)*(col1 - col0) + '\n')       # print spacer, one field per column
+        for row in range(row0, row1):                            # for every line
+            # path indicators of the whole line
+            rights = np.zeros(len(cols), dtype=bool)
+            rights[inner] = self.path[row, cols[inner] + 1] & LEFT
+            downs = np.zeros(len(cols), dtype=bool)
+            diags = np.zeros(len(cols), dtype=bool)
+            if(row < self.row):
+                downs[:] = self.path[row + 1, cols] & UP
+                diags[inner] = self.path[row + 1, cols[inner] + 1] & DIAG
+            # line1 contains the scores and path flags and indicators, line2 is the spacer and contains path indicators
+            marks = [chars[mark] if (backtrace == 1 or mark == TRACE_END) else " " for mark in self.bpath[row, col0:col1].tolist()]
+            line1 = [" " + vSpacer]
+            line1.extend(["{:4d}".format(score) + mark + (right if r else vSpacer) for score, mark, r in zip(self.scores[row, col0:col1].tolist(), marks, rights)])
+            line2 = [self.config.seq1[row] if row < self.row else " ", con]  # the last line has no character
+            line2.extend([hSpacer*2 + (down if d else hSpacer) + hSpacer*2 + (diag if g else con) for d, g in zip(downs, diags)])
+            out.write("".join(line1) + '\n')
+            out.write("".join(line2) + '\n')
     
     # print the spread sheet version shown in the example
-    def printSpreadSheet(self, outFilePath):
-        if(outFilePath != ""):
-            out = open(outFilePath, 'w')
-        else:
-            out = sys.stdout
+    @profiled("output")
+    def printSpreadSheet(self, outFilePath, window=None):
+        if(self.cached):
+            raise Exception("The result was read from the cache, which keeps no matrices")
+        out = openOutput(outFilePath, self.stats)
         out.write("Forward part:" + '\n')
         out.write("" + '\n')
-        self.printMatrix(0, out)
+        self.printMatrix(0, out, window)
         out.write("" + '\n')
         out.write("" + '\n')
         out.write("Backward part:" + '\n')
         out.write("" + '\n')
-        align.printMatrix(1, out)
+        self.printMatrix(1, out, window)
         out.write("" + '\n')
         out.write("" + '\n')
-        out.write("Alignments (Score: " + str(align.score) + "):" + '\n')
-        for ali in align.sequences:
+        self.writeAlignments(out)
+        closeOutput(out)
+    
+    # print only the alignments, used when there are no matrices
+    @profiled("output")
+    def printAlignments(self, outFilePath):
+        out = openOutput(outFilePath, self.stats)
+        self.writeAlignments(out)
+        closeOutput(out)
+    
+    def writeAlignments(self, out):
+        out.write("Alignments (Score: " + str(self.score) + "):" + '\n')
+        for ali in self.sequences:
             out.write("" + '\n')
             out.write(ali[1] + '\n')
             out.write(ali[0] + '\n')
         out.write("" + '\n')
     
+    # print one line per alignment: score, start in sequence 1 and 2 (1-based, file order) and the CIGAR string
+    @profiled("output")
+    def printCigar(self, outFilePath):
+        out = openOutput(outFilePath, self.stats)
+        for ali, span in zip(self.sequences, self.spans):
+            out.write("\t".join([str(self.score), str(span[0][1] + 1), str(span[0][0] + 1), self.cigar(ali)]) + '\n')
+        closeOutput(out)
+    
+    # print the alignments as SAM records, sequence 1 of the config file is the reference and sequence 2 the query
+    @profiled("output")
+    def printSam(self, outFilePath):
+        out = openOutput(outFilePath, self.stats)
+        out.write("@SQ\tSN:seq1\tLN:" + str(self.col) + '\n')
+        for number, (ali, span) in enumerate(zip(self.sequences, self.spans)):
+            cigar = self.cigar(ali)
+            if(cigar != "*"):
+                clipStart = str(span[0][0]) + "S" if span[0][0] > 0 else ""            # unaligned query residues are soft clipped
+                clipEnd = str(self.row - span[1][0]) + "S" if span[1][0] < self.row else ""
+                cigar = clipStart + cigar + clipEnd
+            flag = "0" if number == 0 else "256"                                        # co-optimal alignments are secondary
+            if(cigar == "*"):
+                # nothing aligned (smith waterman score 0): a single unmapped record, every empty alignment looks the same
+                out.write("\t".join(["seq2", "4", "*", "0", "0", "*", "*", "0", "0", self.config.seq1, "*", "AS:i:" + str(self.score)]) + '\n')
+                break
+            out.write("\t".join(["seq2", flag, "seq1", str(span[0][1] + 1), "255", cigar, "*", "0", "0", self.config.seq1, "*", "AS:i:" + str(self.score)]) + '\n')
+        closeOutput(out)
+    
+    def cigar(self, ali):
+        # CIGAR string of an alignment, M for aligned residues, I for residues only in sequence 2 and D for residues only in sequence 1 (file order)
+        if(len(ali[0]) == 0):
+            return "*"
+        query = np.frombuffer(ali[0].encode("ascii"), dtype=np.uint8)
+        reference = np.frombuffer(ali[1].encode("ascii"), dtype=np.uint8)
+        ops = np.full(len(query), ord("M"), dtype=np.uint8)
+        ops[reference == ord("-")] = ord("I")
+        ops[query == ord("-")] = ord("D")
+        starts = np.flatnonzero(np.diff(ops)) + 1                 # first column of every run
+        starts = np.concatenate(([0], starts))
+        lengths = np.diff(np.append(starts, len(ops)))
+        return "".join([str(length) + chr(op) for length, op in zip(lengths.tolist(), ops[starts].tolist())])
+    
+    # print the score and the end point of the best alignment
+    @profiled("output")
+    def printScore(self, outFilePath):
+        out = openOutput(outFilePath, self.stats)
+        out.write("Score: " + str(self.score) + '\n')
+        out.write("End: (" + str(self.end[0]) + "," + str(self.end[1]) + ")" + '\n')
+        closeOutput(out)
+    
+    @profiled("traceback")
     def backtrace(self):
-        # base method for backtracing, will call a recursive routine
-        col1 = self.col + 1                            # for convenience
-        row1 = self.row + 1                            # for convenience
-        self.bpath = np.array([[" "]*col1]*row1)       # stores the backtrace path as characters
+        # base method for backtracing, collects the end points and enumerates the alignments from there
+        self.bpath = self.table(np.uint8)              # stores the backtrace path as TRACE_PART and TRACE_END marks
         if(self.config.algorithm == "nw" or self.config.algorithm == "NW"):
             # if we use needleman wunsch
-            self.backtrace_recursive(self.row, self.col, ("",""))            # start recursive routine
-            self.bpath[self.row][self.col] = self.config.charBacktraceEnd    # mark the end of the path
-            self.score = self.matrix[self.row][self.col][0]                  # save the score
+            self.score = int(self.scores[self.row][self.col])               # save the score
+            self.ends = [(self.row, self.col)]                              # the only end point
         elif(self.config.algorithm == "sw" or self.config.algorithm == "SW"):
             # if we use smith waterman
-            s = (0, [(0,0)])                                         # will contain the scores and and array containing the corresponding points
-            # loop through the matrix and find the highest scores
-            for row in range(0, self.row + 1):
-                for col in range(0, self.col + 1):
-                    if(self.matrix[row][col][0] > s[0]):             # if we found a higher score
-                        s = (self.matrix[row][col][0],[(row, col)])  # overwrite s with new values
-                    elif(self.matrix[row][col][0] == s[0]):          # if the score is equal to our stored one
-                        s[1].append((row, col))                      # append to the list of points
-            self.score = s[0]                                        # store score
-            for point in s[1]:                                       # loop through points
-                self.backtrace_recursive(point[0], point[1], ("",""))# start backtrace for every point with the highest score
-            for point in s[1]:
-                self.bpath[point[0]][point[1]] = self.config.charBacktraceEnd # mark the end of every path
+            # the matrix is scanned tile by tile, so a disk backed matrix is read sequentially and no full size mask is created
+            blocks = range(0, self.row + 1, self.tileRows)
+            self.score = max(int(self.scores[block:block+self.tileRows].max()) for block in blocks) # find the highest score
+            s = (self.score, [(0,0)] if self.score == 0 else [])     # will contain the score and the corresponding points
+            for block in blocks:                                     # all points with the highest score, row by row
+                points = np.argwhere(self.scores[block:block+self.tileRows] == self.score)
+                s[1].extend([(block + point[0], point[1]) for point in points.tolist()])
+            self.ends = s[1]
         elif(self.config.algorithm == "ef" or self.config.algorithm == "EF"):
             # if we use end free
             s = (0, [(0,0)])                                             # used to store the highest score and the respective points
             for row in range(0, self.row):                               # loop through all points of the right boundary 
-                if(self.matrix[row][self.col][0] > s[0]):                # if we found a higher score
-                    s = (self.matrix[row][self.col][0],[(row, self.col)])# overwrite the current s
-                elif(self.matrix[row][self.col][0] == s[0]):             # if we found an equal score
+                if(self.scores[row][self.col] > s[0]):                   # if we found a higher score
+                    s = (self.scores[row][self.col],[(row, self.col)])   # overwrite the current s
+                elif(self.scores[row][self.col] == s[0]):                # if we found an equal score
                     s[1].append((row, self.col))                         # append the point
             for col in range(0, self.col+1):                             # loop through the points of the lower boundary
-                if(self.matrix[self.row][col][0] > s[0]):                # if we found a higher score
-                    s = (self.matrix[self.row][col][0], [(self.row, col)])# overwrite s
-                elif(self.matrix[self.row][col][0] == s[0]):             # if we found an equal score
+                if(self.scores[self.row][col] > s[0]):                   # if we found a higher score
+                    s = (self.scores[self.row][col], [(self.row, col)])  # overwrite s
+                elif(self.scores[self.row][col] == s[0]):                # if we found an equal score
                     s[1].append((self.row, col))                         # append point to s
-            self.score = s[0]                                            # store score
-            for point in s[1]:                                           # loop through all points we found
-                self.backtrace_recursive(point[0],point[1], ("",""))     # backtrace them
-            for point in s[1]:                                           # loop through points again
-                self.bpath[point[0]][point[1]] = self.config.charBacktraceEnd# mark the ends
+            self.score = int(s[0])                                       # store score
+            self.ends = s[1]
         else:
             raise Exception("Cannot backtrace because of undefined algorithm")   # this should never happen bc we check the algorithm while parsing the config file
+        if(self.config.affine()):
+            alignments = self.iterAffineAlignments()
+        else:
+            alignments = self.iterAlignments()
+        if(self.config.maxAlignments > 0):
+            alignments = itertools.islice(alignments, self.config.maxAlignments)  # stop after the configured number of alignments
+        self.sequences.extend(alignments)
+        self.count("alignments", len(self.sequences))
+        for point in self.ends:                                          # loop through the end points
+            self.bpath[point[0]][point[1]] = TRACE_END     # mark the end of every path
 
-    def backtrace_recursive(self,row,col, seq):
-        # recursive backtrace routine
-        try:
-            seq1 = seq[0] # for convenience
-            seq2 = seq[1] # for convenience
-            self.bpath[row][col] = self.config.charBacktracePart # mark the current path field
-            if( (row,col,row-1,col) in self.path.keys()):            
-                upPath = 1   # contains 0 or 1, depending on the existence of a path
-            else:
-                upPath = 0
+    def iterAlignments(self):
+        # yields the co-optimal alignments of all end points one by one, every path is followed left before diagonal before up.
+        # the path is walked with an explicit stack, the characters are collected back to front and reversed once per alignment
+        nw = self.config.algorithm == "nw" or self.config.algorithm == "NW"
+        ef = self.config.algorithm == "ef" or self.config.algorithm == "EF"
+        seq1 = self.config.seq1
+        seq2 = self.config.seq2
+        for point in self.ends:
+            buf1 = []                                  # characters of the current path, back to front
+            buf2 = []
+            stack = [(point[0], point[1], 0, None, None)] # cell, length of the path before the cell and the characters leading to it
+            while(stack):
+                row, col, length, char1, char2 = stack.pop()
+                del buf1[length:]                      # drop the characters of the path we backtracked from
+                del buf2[length:]
+                if(char1 is not None):
+                    buf1.append(char1)
+                    buf2.append(char2)
+                self.bpath[row][col] = TRACE_PART             # mark the current path field
+                bits = self.path[row][col]
+                # we have different conditions for exit
+                if((nw and row == 0 and col == 0) or (ef and (row == 0 or col == 0)) or (not nw and not ef and bits == 0)):
+                    # (0,0) in needleman wunsch, the upper or left boundary in end free, nowhere to go in smith waterman
+                    self.spans.append(((row, col), point))
+                    yield ("".join(reversed(buf1)), "".join(reversed(buf2)))
+                    continue
+                length = len(buf1)
+                # pushed in reverse order, so left is popped first
+                if(bits & UP):                                       # if we can go up
+                    stack.append((row-1, col, length, seq1[row-1], "-"))
+                if(bits & DIAG):                                     # if we can go diagonal
+                    stack.append((row-1, col-1, length, seq1[row-1], seq2[col-1]))
+                if(bits & LEFT):                                     # if we can go left
+                    stack.append((row, col-1, length, "-", seq2[col-1]))
 
-            if( (row,col,row,col-1) in self.path.keys()):
-                leftPath = 1 # contains 0 or 1, depending on the existence of a path
-            else:
-                leftPath = 0
-            if( (row,col,row-1,col-1) in self.path.keys()):
-                diagPath = 1
-            else: 
-                diagPath = 0 # contains 0 or 1, depending on the existence of a path
-            # print(str(seq) + " row: " + str(row) + " col: " + str(col) + " up: " + str(upPath) + " left: " + str(leftPath) + " diag: " + str(diagPath))
-            # we have different conditions for exit
-            if((self.config.algorithm == "nw" or self.config.algorithm == "NW") and row == 0 and col == 0): # if we reach (0,0) in needlemanWunsch
-                self.sequences.append(seq)
-                return            
-            if((self.config.algorithm == "ef" or self.config.algorithm == "EF") and (row == 0 or col == 0)):# if we reach the upper or left boundary in end free
-                self.sequences.append(seq)
-                return
-            if((self.config.algorithm == "sw" or self.config.algorithm == "SW") and (upPath == 0 and leftPath == 0 and diagPath == 0 )):
-                # if we have nowhere to go in smith waterman 
-                # note: the scoring algorithm (calcscore_recursive())marks the path. If a score gets below 0 it is set to 0 and the path ends.
-                # we could've also just checked the score instead
-                self.sequences.append(seq)
-                return
-            if(leftPath == 1):                                  # if we can go left
-                # print("left")
-                s1 = "-" + seq1                                 # append "-"
-                s2 = self.config.seq2[col-1] + seq2             # append next character to the sequence
-                self.backtrace_recursive(row, col-1, (s1,s2))   # go to the left field
-            if(diagPath == 1):                                  # if we can go diagonal
-                # print("diag")
-                s1 = self.config.seq1[row-1] + seq1             # align char of seq1 with...
-                s2 = self.config.seq2[col-1] + seq2             # ...char of seq2
-                self.backtrace_recursive(row-1, col-1,(s1,s2))  # go diagonal
-            if(upPath == 1):                                    # if we can go up
-                # print("up")
-                s1 = self.config.seq1[row-1] + seq1             # append next character to the sequence
-                s2 = "-" + seq2                                 # appen "-"
-                self.backtrace_recursive(row-1,col, (s1,s2))    # go up
-            # up = self.matrix[row-1][col][0]
-            # left = self.matrix[row][col-1][0]
-            # diag = self.matrix[row-1][col-1][0]
-            '''if(upPath == 1 and leftPath == 1 and diagPath == 1):
-                if(up >= left and up >= diag):
-                    self.backtrace_recursive(row-1,col)
-                if(left >= up and left >= diag):
-                    self.backtrace_recursive(row, col-1)
-                if(diag >= up and diag >= left):
-                    self.backtrace_recursive(row-1, col-1)
-            elif(upPath == 1 and leftPath == 1 and diagPath == 0):
-                if(up >= left):
-                    self.backtrace_recursive(row-1,col)
-                if(left >= up):
-                    self.backtrace_recursive(row, col-1)
-            elif(upPath == 1 and leftPath == 0 and diagPath == 0):
-                self.backtrace_recursive(row-1,col)
-            elif(upPath == 0 and leftPath == 1 and diagPath == 1):
-                if(left >= diag):
-                    self.backtrace_recursive(row, col-1)
-                if(diag >= left):
-                    self.backtrace_recursive(row-1, col-1)
-            elif(upPath == 0 and leftPath == 0 and diagPath == 1):
-                self.backtrace_recursive(row-1, col-1)
-            elif(upPath == 0 and leftPath == 1 and diagPath == 0):
-                self.backtrace_recursive(row, col-1)
-            elif(upPath == 1 and leftPath == 0 and diagPath == 1):
-                if(up >= diag):
-                    self.backtrace_recursive(row-1,col)
-                if(diag >= up):
-                    self.backtrace_recursive(row-1, col-1)
-            else: 
-                print("fuck my life")'''
-            
-        except IndexError:
-            self.sequences.append(seq)
-            return
+    def iterAffineAlignments(self):
+        # same as iterAlignments for the three affine matrices. A cell is entered in state H (the best of the three) or in
+        # the state a gap continues from, M goes on diagonally, X up and Y left
+        nw = self.config.algorithm == "nw" or self.config.algorithm == "NW"
+        sw = self.config.algorithm == "sw" or self.config.algorithm == "SW"
+        gapOpen = self.config.gapOpen
+        gapExtend = self.config.gapExtend
+        seq1 = self.config.seq1
+        seq2 = self.config.seq2
+        for point in self.ends:
+            buf1 = []                                  # characters of the current path, back to front
+            buf2 = []
+            stack = [(point[0], point[1], "H", 0, None, None)] # cell, state, length of the path before and the characters leading to it
+            while(stack):
+                row, col, state, length, char1, char2 = stack.pop()
+                del buf1[length:]                      # drop the characters of the path we backtracked from
+                del buf2[length:]
+                if(char1 is not None):
+                    buf1.append(char1)
+                    buf2.append(char2)
+                self.bpath[row][col] = TRACE_PART             # mark the current path field
+                if(state == "H" or state == "M"):
+                    # (0,0) in needleman wunsch, any boundary in end free and smith waterman, nowhere to go in smith waterman
+                    if((nw and row == 0 and col == 0) or (not nw and (row == 0 or col == 0)) or (sw and state == "H" and self.path[row][col] == 0)):
+                        self.spans.append(((row, col), point))
+                        yield ("".join(reversed(buf1)), "".join(reversed(buf2)))
+                        continue
+                length = len(buf1)
+                # pushed in reverse order, so left (Y) is popped before diagonal (M) before up (X)
+                if(state == "H"):
+                    bits = self.path[row][col]
+                    if(bits & UP):
+                        stack.append((row, col, "X", length, None, None))
+                    if(bits & DIAG):
+                        stack.append((row, col, "M", length, None, None))
+                    if(bits & LEFT):
+                        stack.append((row, col, "Y", length, None, None))
+                elif(state == "M"):
+                    stack.append((row-1, col-1, "H", length, seq1[row-1], seq2[col-1]))
+                elif(state == "X"):
+                    score = int(self.scoresX[row][col])
+                    if(int(self.scoresX[row-1][col]) + gapExtend == score):
+                        stack.append((row-1, col, "X", length, seq1[row-1], "-"))
+                    if(int(self.scoresM[row-1][col]) + gapOpen == score):
+                        stack.append((row-1, col, "M", length, seq1[row-1], "-"))
+                    if(int(self.scoresY[row-1][col]) + gapOpen == score):
+                        stack.append((row-1, col, "Y", length, seq1[row-1], "-"))
+                else:
+                    score = int(self.scoresY[row][col])
+                    if(int(self.scoresX[row][col-1]) + gapOpen == score):
+                        stack.append((row, col-1, "X", length, "-", seq2[col-1]))
+                    if(int(self.scoresM[row][col-1]) + gapOpen == score):
+                        stack.append((row, col-1, "M", length, "-", seq2[col-1]))
+                    if(int(self.scoresY[row][col-1]) + gapExtend == score):
+                        stack.append((row, col-1, "Y", length, "-", seq2[col-1]))
 
 class config:
     """Generates the config out of a single file input"""
@@ -332,8 +1137,26 @@ class config:
     match = 0      # matching score
     mismatch = 0   # mismatch score
     indel = 0      # indel score
+    matrix = ""    # path of the substitution matrix, match and mismatch are used if empty
+    gapOpen = None     # score of the first position of a gap, indel is used for every position if None
+    gapExtend = None   # score of every further position of a gap
     seq1 = ""      # sequence 1
     seq2 = ""      # sequence 2
+    engine = "iterative"    # engine used to fill the score matrix, either iterative or recursive
+    scoreOnly = False       # only calculate the score and the end of the best alignment
+    linear = False          # calculate one optimal alignment in linear space (hirschberg)
+    workers = None          # worker processes of the tiled engine, the number of cpus if None
+    tile = 1024             # rows and columns of a tile of the tiled engine
+    scratch = ""            # directory of the disk backed matrices, the matrices are kept in memory if empty
+    band = None             # half width of the band around the diagonal or "auto", the full matrix is used if None
+    bandCheck = False       # double the band while an alignment leaving it could score higher
+    maxAlignments = 0       # maximum number of enumerated co-optimal alignments, 0 means all of them
+    seed = None             # length of the exact seeds of the seed and extend mode (smith waterman), the full matrix is used if None
+    xDrop = 20              # an extension of a seed stops when its score falls this far below the best score seen
+    profile = False         # collect the phase times and counters in aligner.stats
+    cache = ""              # path of the result cache database, results are not cached if empty
+    cacheSize = 256 * 2**20 # bytes of records kept in the cache, the least recently used ones are evicted
+    parseTime = 0.0         # seconds spent reading the config file and the substitution matrix
     charPathDown = "|"      # for the matrix display
     charPathRight = "-"     # for the matrix display
     charPathDiag = "\\"     # for the matrix display
@@ -342,8 +1165,11 @@ class config:
     charVSpacer = "|"       # for the matrix display
     charHSpacer = "-"       # for the matrix display
     charSpacerCon = "+"
-    # constructor - already reads the file and fills everything
-    def __init__(self, path):
+    # constructor - already reads the file and fills everything, the sequences are optional if sequences is False (batch mode).
+    # matrix is the path of a substitution matrix that replaces match, mismatch and the matrix of the file,
+    # gapOpen and gapExtend replace the affine gap scores of the file
+    def __init__(self, path, sequences=True, matrix=None, gapOpen=None, gapExtend=None):
+        start = time.perf_counter()
         file = open(path, 'r')                                 # open config file in read mode
         text = file.read()                                     # read everything for convenience
         file.close()                                           # close file
@@ -352,8 +1178,16 @@ class config:
         match = re.search("match:\s([\+|-][\d]+)", text)       # search the matching score
         mismatch = re.search("mismatch:\s([\+|-][\d]+)", text) # search the mismatching score
         indel = re.search("indel:\s([\+|-][\d]+)", text)       # search the indel score
-        seq2 = re.search("seq1: ([A-Z]{1,200})", text)         # search sequence 1
-        seq1 = re.search("seq2: ([A-Z]{1,200})", text)         # search sequence 2
+        gapScores = gapOpen is not None and gapExtend is not None
+        if(not gapScores):
+            gapOpen = re.search(r"gapopen:\s([\+|-][\d]+)", text)  # search the affine gap scores
+            gapExtend = re.search(r"gapextend:\s([\+|-][\d]+)", text)
+        if(matrix is None):
+            matrix = re.search(r"matrix:\s(\S+)", text)        # search the substitution matrix file
+            if(matrix):
+                matrix = os.path.join(os.path.dirname(path), matrix.group(1))   # relative to the config file
+        seq2 = re.search("seq1: ([A-Za-z*]+)", text)           # search sequence 1
+        seq1 = re.search("seq2: ([A-Za-z*]+)", text)           # search sequence 2
         #
         # check all the fields and save them if they're ok    
         if(algo):
@@ -363,42 +1197,611 @@ class config:
         
         if(match):
             self.match = int(match.group(1))
-        else:
+        elif(not matrix):
             raise Exception("Match score not defined in file " + path + ". Please insert 'match: yX', where y is either + or - and X is a number.")
         
         if(mismatch):
             self.mismatch = int(mismatch.group(1))
-        else:
+        elif(not matrix):
             raise Exception("Mismatch score not defined in file " + path + ". Please insert 'mismatch: yX', where y is either + or - and X is a number.")      
         
+        if(gapScores):
+            self.gapOpen = gapOpen
+            self.gapExtend = gapExtend
+        elif(gapOpen and gapExtend):
+            self.gapOpen = int(gapOpen.group(1))
+            self.gapExtend = int(gapExtend.group(1))
+        elif(gapOpen or gapExtend):
+            raise Exception("Affine gaps need both scores in file " + path + ". Please insert 'gapopen: yX' and 'gapextend: yX', where y is either + or - and X is a number.")
+        
         if(indel):
             self.indel = int(indel.group(1))
-        else:
+        elif(not gapScores and not gapOpen):
             raise Exception("Indel score not defined in file " + path + ". Please insert 'indel: yX', where y is either + or - and X is a number.")
         
         if(seq1):
             self.seq1 = seq1.group(1)
-        else:
-            raise Exception("Sequence one not found in file " + path + ". Please insert 'seq1: S', where S can be a sequence with a length between one and 200 characters.")
+        elif(sequences):
+            raise Exception("Sequence one not found in file " + path + ". Please insert 'seq1: S', where S is a sequence of letters.")
         
         if(seq2):
             self.seq2 = seq2.group(1)
+        elif(sequences):
+            raise Exception("Sequence one not found in file " + path + ". Please insert 'seq2: S', where S is a sequence of letters.")
+        
+        if(matrix):
+            self.loadMatrix(matrix)
         else:
-            raise Exception("Sequence one not found in file " + path + ". Please insert 'seq2: S', where S can be a sequence with a length between one and 200 characters.")
+            self.useMatchMismatch()
+        self.parseTime += time.perf_counter() - start
     
     # methods
+    def affine(self):
+        # True if gaps are scored with gap open and gap extend
+        return self.gapOpen is not None
+
+    def useMatchMismatch(self):
+        # every byte is its own residue, the substitution matrix holds match on the diagonal and mismatch everywhere else
+        self.matrix = ""
+        self.codes = np.arange(256, dtype=np.uint8)
+        self.substitution = np.full((256, 256), self.mismatch, dtype=np.int64)
+        np.fill_diagonal(self.substitution, self.match)
+
+    def loadMatrix(self, path):
+        # reads a substitution matrix in NCBI format (BLOSUM62, PAM250, ...). residues missing from the matrix
+        # are scored like '*' or 'X', lower case letters like upper case ones
+        file = open(path, 'r')
+        lines = [line.split() for line in file if line.strip() != "" and not line.startswith("#")]
+        file.close()
+        alphabet = lines[0]                                    # column header
+        if(len(lines) - 1 != len(alphabet) or any(len(line) != len(alphabet) + 1 for line in lines[1:])):
+            raise Exception("Substitution matrix " + path + " is not a square NCBI matrix.")
+        order = [alphabet.index(line[0]) for line in lines[1:]]  # the rows may be in another order than the columns
+        substitution = np.zeros((len(alphabet), len(alphabet)), dtype=np.int64)
+        for row, line in zip(order, lines[1:]):
+            substitution[row] = [int(value) for value in line[1:]]
+        if("*" in alphabet):
+            unknown = alphabet.index("*")
+        elif("X" in alphabet):
+            unknown = alphabet.index("X")
+        else:
+            unknown = len(alphabet)                            # an extra residue, using it raises in encode
+        codes = np.full(256, unknown, dtype=np.uint8)
+        for index, residue in enumerate(alphabet):
+            codes[ord(residue.lower())] = index
+            codes[ord(residue.upper())] = index
+        self.matrix = path
+        self.alphabet = "".join(alphabet)
+        self.codes = codes
+        self.substitution = substitution
+
+    def encode(self, seq):
+        # turns a sequence into an index array for the substitution matrix
+        codes = self.codes[np.frombuffer(seq.encode("ascii"), dtype=np.uint8)]
+        if(len(codes) > 0 and codes.max() >= len(self.substitution)):
+            raise Exception("Sequence contains residues that are not part of the substitution matrix " + self.matrix)
+        return codes
+
+    def forPair(self, seq1, seq2):
+        # copy of this config for another pair, seq1 and seq2 are given in the order of the config file
+        conf = copy.copy(self)
+        conf.seq1 = seq2                                       # the parser stores the sequences swapped, see above
+        conf.seq2 = seq1
+        return conf
+
+class batch:
+    """Aligns many sequence pairs from a FASTA pair list or a TSV file with a process pool"""
+    # constructor
+    def __init__(self, conf, path, fmt="auto", maxAlignments=BATCH_MAX_ALIGNMENTS):
+        self.config = copy.copy(conf)   # shared scores and algorithm settings
+        self.config.maxAlignments = maxAlignments  # bounds the traceback of every pair, 0 means all alignments
+        self.path = path            # path of the pair file
+        self.format = fmt           # fasta, tsv or auto
+        if(self.format == "auto"):
+            file = open(path, 'r')
+            first = file.readline()
+            file.close()
+            self.format = "fasta" if first.startswith(">") else "tsv"
+
+    def readPairs(self):
+        # yields (name, seq1, seq2) for every pair in the file
+        if(self.format == "fasta"):
+            pending = None                                     # first record of the current pair
+            for record in readFasta(self.path):
+                if(pending is None):
+                    pending = record
+                else:
+                    yield (pending[0] + "/" + record[0], pending[1], record[1])
+                    pending = None
+            if(pending is not None):
+                raise Exception("FASTA file " + self.path + " contains an odd number of records, sequences are paired in order of appearance.")
+        elif(self.format == "tsv"):
+            file = open(self.path, 'r')
+            for number, line in enumerate(file, 1):
+                line = line.rstrip("\r\n")
+                if(line == "" or line.startswith("#")):
+                    continue
+                fields = line.split("\t")
+                if(len(fields) == 2):
+                    yield (str(number), fields[0], fields[1])  # unnamed pairs are named after their line
+                elif(len(fields) == 3):
+                    yield (fields[0], fields[1], fields[2])
+                else:
+                    file.close()
+                    raise Exception("Line " + str(number) + " of " + self.path + " has to be 'seq1<TAB>seq2' or 'name<TAB>seq1<TAB>seq2'.")
+            file.close()
+        else:
+            raise Exception("Batch format \"" + self.format + "\" not implemented")
+
+    def chunks(self, chunksize):
+        # groups the pairs into lists of chunksize pairs, these are the tasks sent to the workers
+        pairs = self.readPairs()
+        while(True):
+            chunk = list(itertools.islice(pairs, chunksize))
+            if(not chunk):
+                return
+            yield chunk
+
+    def run(self, outFilePath, workers=None, chunksize=64, order="input"):
+        # aligns all pairs and streams one line per pair in input or completion order
+        out = openOutput(outFilePath)
+        if(workers is None):
+            workers = os.cpu_count() or 1
+        pool = concurrent.futures.ProcessPoolExecutor(max_workers=workers, initializer=initBatchWorker, initargs=(self.config,))
+        window = 4 * workers                                   # chunks in flight, keeps the memory bounded
+        pending = collections.deque()
+        try:
+            for chunk in self.chunks(chunksize):
+                pending.append(pool.submit(alignChunk, chunk))
+                if(len(pending) >= window):
+                    self.writeDone(pending, order, out)
+            while(pending):
+                self.writeDone(pending, order, out)
+        finally:
+            pool.shutdown(cancel_futures=True)                 # also after a malformed pair or a failed chunk
+        closeOutput(out)
+
+    def writeDone(self, pending, order, out):
+        # waits for the next chunk (input order) or any chunk (completion order) and writes its results
+        if(order == "input"):
+            future = pending.popleft()
+        else:
+            done, _ = concurrent.futures.wait(pending, return_when=concurrent.futures.FIRST_COMPLETED)
+            future = done.pop()
+            pending.remove(future)
+        for result in future.result():
+            self.writeResult(result, out)
+
+    def writeResult(self, result, out):
+        # name, score, end point and the aligned sequences (first sequence first), separated by tabs
+        name, score, end, sequences = result
+        fields = [name, str(score), str(end[1]) + "," + str(end[0])]   # end is in the swapped order of the aligner
+        for ali in sequences:
+            fields.append(ali[1])
+            fields.append(ali[0])
+        out.write("\t".join(fields) + '\n')
+
+class search:
+    """Searches one query against every sequence of a FASTA database with Smith&Waterman and reports the best hits"""
+    # constructor
+    def __init__(self, conf, path, top=10, lanes=64, maxAlignments=BATCH_MAX_ALIGNMENTS):
+        if(conf.algorithm != "sw" and conf.algorithm != "SW"):
+            raise Exception("Search mode needs the Smith&Waterman algorithm. Please insert 'alg: sw' in the config file.")
+        if(conf.affine()):
+            raise Exception("Search mode does not support affine gaps.")
+        if(conf.seq2 == ""):
+            raise Exception("Search mode needs a query. Please insert 'seq1: S' in the config file.")
+        if(top < 1 or lanes < 1):
+            raise Exception("Search mode needs at least one reported hit and one lane.")
+        self.config = copy.copy(conf)   # shared scores, the query is the first sequence of the config file
+        self.config.maxAlignments = maxAlignments  # bounds the traceback of every hit, 0 means all alignments
+        self.path = path            # path of the FASTA database
+        self.top = top              # number of reported hits
+        self.lanes = lanes          # database sequences scored at once
+        self.query = conf.encode(conf.seq2)
+        self.profile = self.queryProfile()
+        self.hits = []              # (score, name, sequence) of the best hits, best first
+
+    def queryProfile(self):
+        # score vector of every residue code against the query, the diagonal scores of a column are a single lookup
+        return self.config.substitution[:,self.query]
+
+    def scoreLanes(self, codes, lengths):
+        # smith waterman scores of several database sequences at once. codes holds one padded sequence per lane,
+        # the columns (database positions) are filled one after another, every column is a few vector operations over all lanes
+        lanes = codes.shape[0]
+        indel = self.config.indel
+        offset = np.arange(len(self.query) + 1, dtype=np.int64) * indel
+        column = np.zeros((lanes, len(self.query) + 1), dtype=np.int64)
+        best = np.zeros(lanes, dtype=np.int64)
+        cand = np.zeros_like(column)                       # best score without the chain of moves along the query
+        for col in range(codes.shape[1]):
+            subst = self.profile[codes[:,col]]
+            np.maximum(column[:,:-1] + subst, column[:,1:] + indel, out=cand[:,1:])
+            np.maximum(cand, 0, out=cand)                  # smith waterman never goes below 0
+            column = np.maximum.accumulate(cand - offset, axis=1) + offset  # same prefix max trick as fillRow
+            active = lengths > col                         # padded positions do not count
+            best = np.where(active, np.maximum(best, column.max(axis=1)), best)
+        return best
+
+    def groups(self):
+        # reads the database in groups of several lanes, sorted by length so that little padding is needed
+        records = enumerate(readFasta(self.path))
+        while(True):
+            group = list(itertools.islice(records, 8 * self.lanes))
+            if(not group):
+                return
+            group.sort(key=lambda record: len(record[1][1]))
+            for start in range(0, len(group), self.lanes):
+                yield group[start:start+self.lanes]
+
+    def run(self):
+        # scores the whole database and keeps the best hits, ties are decided by the database order
+        heap = []                   # (score, -index, name, sequence), the worst hit is on top
+        for group in self.groups():
+            lengths = np.array([len(record[1][1]) for record in group], dtype=np.int64)
+            codes = np.zeros((len(group), int(lengths.max())), dtype=np.uint8)
+            for lane, record in enumerate(group):
+                codes[lane,:lengths[lane]] = self.config.encode(record[1][1])
+            scores = self.scoreLanes(codes, lengths)
+            for lane, record in enumerate(group):
+                entry = (int(scores[lane]), -record[0], record[1][0], record[1][1])
+                if(len(heap) < self.top):
+                    heapq.heappush(heap, entry)
+                elif(entry > heap[0]):
+                    heapq.heapreplace(heap, entry)
+        self.hits = [(entry[0], entry[2], entry[3]) for entry in sorted(heap, reverse=True)]
+
+    def printHits(self, outFilePath):
+        # aligns the query with every reported hit and prints the alignments
+        out = openOutput(outFilePath)
+        for number, hit in enumerate(self.hits, 1):
+            align = aligner(self.config.forPair(self.config.seq2, hit[2]))  # traceback only for the reported hits
+            out.write("Hit " + str(number) + ": " + hit[1] + '\n')
+            out.write("" + '\n')
+            align.writeAlignments(out)
+        closeOutput(out)
+
+class resultCache:
+    """Persistent cache of alignment results in a SQLite database, the least recently used records are evicted"""
+    # attributes of the aligner stored in a record, end or ends is missing depending on the mode
+    FIELDS = ["score", "end", "ends", "sequences", "spans"]
+
+    # constructor
+    def __init__(self, path, size):
+        self.path = path
+        self.size = size            # bytes of records kept in the database
+        self.hits = 0               # counters of this process, the totals of all processes are in the stats table
+        self.misses = 0
+        self.evictions = 0
+        self.db = sqlite3.connect(path, timeout=60, isolation_level=None)   # transactions are started explicitly
+        self.db.execute("CREATE TABLE IF NOT EXISTS results (key TEXT PRIMARY KEY, record BLOB, size INTEGER, used REAL)")
+        self.db.execute("CREATE INDEX IF NOT EXISTS resultsUsed ON results (used)")
+        self.db.execute("CREATE TABLE IF NOT EXISTS stats (name TEXT PRIMARY KEY, value INTEGER)")
+        self.db.execute("INSERT OR IGNORE INTO stats VALUES ('hits', 0), ('misses', 0), ('evictions', 0), ('bytes', 0)")
+
+    def key(self, conf):
+        # hash of everything the result depends on: the pair, the algorithm, the scores and the mode. The engine only changes the speed
+        digest = hashlib.sha256()
+        for part in (conf.seq1, conf.seq2, conf.algorithm.lower(), conf.indel, conf.gapOpen, conf.gapExtend,
+                     conf.scoreOnly, conf.linear, conf.band, conf.bandCheck, conf.maxAlignments, conf.seed, conf.xDrop):
+            digest.update(repr(part).encode() + b"\0")
+        digest.update(conf.codes.tobytes())                   # the substitution matrix covers match and mismatch
+        digest.update(conf.substitution.astype(np.int64).tobytes())
+        return digest.hexdigest()
+
+    def load(self, key, align):
+        # restores the attributes of a cached result in align, returns False on a miss
+        self.db.execute("BEGIN IMMEDIATE")
+        try:
+            row = self.db.execute("SELECT record FROM results WHERE key = ?", (key,)).fetchone()
+            if(row is None):
+                self.misses += 1
+                self.db.execute("UPDATE stats SET value = value + 1 WHERE name = 'misses'")
+            else:
+                self.hits += 1
+                self.db.execute("UPDATE stats SET value = value + 1 WHERE name = 'hits'")
+                self.db.execute("UPDATE results SET used = ? WHERE key = ?", (time.time(), key))
+            self.db.execute("COMMIT")
+        except BaseException:
+            self.db.execute("ROLLBACK")
+            raise
+        if(row is None):
+            return False
+        record = json.loads(zlib.decompress(row[0]))
+        align.score = record["score"]
+        if("end" in record):
+            align.end = tuple(record["end"])
+        if("ends" in record):
+            align.ends = [tuple(point) for point in record["ends"]]
+        align.sequences = [tuple(ali) for ali in record["sequences"]]   # json stores the tuples as lists
+        align.spans = [(tuple(start), tuple(end)) for start, end in record["spans"]]
+        return True
+
+    def store(self, key, align):
+        # stores the result of align and evicts the least recently used records until the database fits into size
+        record = dict()
+        for name in self.FIELDS:
+            if(hasattr(align, name)):
+                record[name] = getattr(align, name)
+        blob = zlib.compress(json.dumps(record, separators=(",", ":")).encode())
+        self.db.execute("BEGIN IMMEDIATE")
+        try:
+            old = self.db.execute("SELECT size FROM results WHERE key = ?", (key,)).fetchone()   # another process may have stored it
+            change = len(blob) - (old[0] if old is not None else 0)
+            self.db.execute("INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?)", (key, blob, len(blob), time.time()))
+            total = self.db.execute("SELECT value FROM stats WHERE name = 'bytes'").fetchone()[0] + change
+            evicted = 0
+            while(total > self.size):
+                victims = self.db.execute("SELECT key, size FROM results ORDER BY used LIMIT 64").fetchall()
+                if(not victims):
+                    total = 0                                  # the database is empty
+                    break
+                for victim, size in victims:
+                    if(total <= self.size):
+                        break
+                    self.db.execute("DELETE FROM results WHERE key = ?", (victim,))
+                    total -= size
+                    evicted += 1
+            self.db.execute("UPDATE stats SET value = ? WHERE name = 'bytes'", (total,))
+            self.db.execute("UPDATE stats SET value = value + ? WHERE name = 'evictions'", (evicted,))
+            self.db.execute("COMMIT")
+        except BaseException:
+            self.db.execute("ROLLBACK")
+            raise
+        self.evictions += evicted
+
+    def totals(self):
+        # hits, misses, evictions and bytes of all processes that used the database, and the number of records
+        totals = dict(self.db.execute("SELECT name, value FROM stats").fetchall())
+        totals["records"] = self.db.execute("SELECT COUNT(*) FROM results").fetchone()[0]
+        return totals
+
+    def printStats(self, out=sys.stderr):
+        # one "name: value" line per counter of the database
+        for name, value in sorted(self.totals().items()):
+            out.write("cache " + name + ": " + str(value) + "\n")
+
+class countingOutput:
+    """Counts the bytes written to an output in stats["bytes"]"""
+    def __init__(self, out, stats):
+        self.out = out
+        self.stats = stats
+
+    def write(self, text):
+        self.stats["bytes"] += len(text)
+        return self.out.write(text)
+
+    def flush(self):
+        self.out.flush()
+
+# state of a batch worker, set up once per process by initBatchWorker so the scores are not sent with every chunk
+batchWorker = dict()
+
+def initBatchWorker(conf):
+    batchWorker["config"] = conf
+
+# batch worker, has to be a module level function to be sent to the pool
+def alignChunk(chunk):
+    results = []
+    for name, seq1, seq2 in chunk:
+        align = aligner(batchWorker["config"].forPair(seq1, seq2))
+        end = align.ends[0] if hasattr(align, "ends") else align.end   # the full matrix backtrace knows several ends
+        results.append((name, align.score, end, align.sequences))
+    return results
+
+# result caches of this process by path, the connection is kept open for all aligners
+caches = dict()
+
+def openCache(path, size):
+    if(path not in caches):
+        caches[path] = resultCache(path, size)
+    return caches[path]
+
+# computes cur[1:] from the previous row and cur[0], returns the path bits of the computed cells
+def fillRow(prev, cur, subst, indel, local):
+    prev = prev.astype(np.int64)                           # avoid overflows in the intermediate results
+    diag = prev[:-1] + subst                               # coming from the diagonal
+    up = prev[1:] + indel                                  # coming from the cell above
+    best = np.empty(len(prev), dtype=np.int64)             # best score without the chain of left moves
+    best[0] = cur[0]
+    np.maximum(diag, up, out=best[1:])
+    if(local):
+        np.maximum(best, 0, out=best)                      # smith waterman never goes below 0
+    # resolve the chain of left moves: cur[k] = max(best[k], cur[k-1] + indel) = max over j<=k of best[j] + (k-j)*indel
+    offset = np.arange(len(prev), dtype=np.int64) * indel
+    row = np.maximum.accumulate(best - offset) + offset
+    cur[1:] = row[1:]
+    left = row[:-1] + indel
+    row = row[1:]
+    # every incoming path with the winning score is kept, just like calcScore does
+    bits = (diag == row) * np.uint8(DIAG)
+    bits |= (left == row) * np.uint8(LEFT)
+    bits |= (up == row) * np.uint8(UP)
+    return bits
+
+# state of a tiled engine worker, set up once per process by initTileWorker
+tileWorker = dict()
+
+def initTileWorker(names, shape, code1, code2, substitution, indel, local):
+    scores = shared_memory.SharedMemory(name=names[0])
+    path = shared_memory.SharedMemory(name=names[1])
+    tileWorker["memory"] = (scores, path)                  # keeps the mappings open
+    tileWorker["scores"] = np.ndarray(shape, dtype=np.int32, buffer=scores.buf)
+    tileWorker["path"] = np.ndarray(shape, dtype=np.uint8, buffer=path.buf)
+    tileWorker["code1"] = code1
+    tileWorker["code2"] = code2
+    tileWorker["substitution"] = substitution
+    tileWorker["indel"] = indel
+    tileWorker["local"] = local
+
+# fills rows rows[0]..rows[1]-1 and columns cols[0]..cols[1]-1, the row above and the column left of the tile have to be done
+def fillTile(rows, cols):
+    scores = tileWorker["scores"]
+    code2 = tileWorker["code2"][cols[0]-1:cols[1]-1]
+    for row in range(rows[0], rows[1]):
+        subst = tileWorker["substitution"][tileWorker["code1"][row-1]][code2]
+        tileWorker["path"][row, cols[0]:cols[1]] = fillRow(scores[row-1, cols[0]-1:cols[1]], scores[row, cols[0]-1:cols[1]], subst, tileWorker["indel"], tileWorker["local"])
+
+# buffered output file, stdout if no path is given. with stats the written bytes are added to stats["bytes"]
+def openOutput(outFilePath, stats=None):
+    if(outFilePath != ""):
+        out = open(outFilePath, 'w', buffering=1 << 20)
+    else:
+        out = sys.stdout
+    if(stats is not None):
+        return countingOutput(out, stats)
+    return out
+
+def closeOutput(out):
+    if(isinstance(out, countingOutput)):
+        out = out.out
+    if(out is sys.stdout):
+        out.flush()
+    else:
+        out.close()
+
+# parses the half width of --band, either "auto" or a number >= 0
+def parseBand(text):
+    if(text == "auto"):
+        return text
+    if(not re.fullmatch(r"\d+", text)):
+        raise argparse.ArgumentTypeError("band \"" + text + "\" has to be 'auto' or a number >= 0")
+    return int(text)
+
+# parses a matrix window "row0:row1,col0:col1", missing bounds mean the start or end of the matrix
+def parseWindow(text):
+    window = []
+    for part in text.split(","):
+        bounds = part.split(":")
+        if(len(bounds) != 2 or any(not re.fullmatch(r"\d*", bound) for bound in bounds)):
+            raise argparse.ArgumentTypeError("matrix window \"" + text + "\" has to be 'row0:row1,col0:col1'")
+        window.append((int(bounds[0]) if bounds[0] != "" else 0, int(bounds[1]) if bounds[1] != "" else sys.maxsize))
+    if(len(window) == 1):
+        window.append((0, sys.maxsize))                  # all columns
+    if(len(window) != 2):
+        raise argparse.ArgumentTypeError("matrix window \"" + text + "\" has to be 'row0:row1,col0:col1'")
+    return tuple(window)
+
+# yields (name, sequence) for every record of a FASTA file
+def readFasta(path):
+    name = None
+    parts = []
+    file = open(path, 'r')
+    for line in file:
+        line = line.strip()
+        if(line.startswith(">")):
+            if(name is not None):
+                yield (name, "".join(parts))
+            name = line[1:].split()[0] if len(line) > 1 else ""
+            parts = []
+        elif(line != ""):
+            parts.append(line)
+    file.close()
+    if(name is not None):
+        yield (name, "".join(parts))
 
 
 ###############################
 #main##########################
 ###############################
 
-# commandline argument configuration
-parser = argparse.ArgumentParser()
-parser.add_argument("infile", help="config file, which specifies the sequences, scores and the algorithm to use")
-parser.add_argument("outfile", nargs='?', default="", help="output file")
-args = parser.parse_args()
-conf = config(args.infile)             # create config object (parses config file)
-align = aligner(conf)                # create aligner. this will start the alignment based on the provided configs
-#print(align.matrix)
-align.printSpreadSheet(args.outfile)             # print out neat little spread sheet 
+if __name__ == "__main__":
+    # commandline argument configuration
+    parser = argparse.ArgumentParser()
+    parser.add_argument("infile", help="config file, which specifies the sequences, scores and the algorithm to use")
+    parser.add_argument("outfile", nargs='?', default="", help="output file")
+    parser.add_argument("--matrix", help="substitution matrix in NCBI format (e.g. BLOSUM62), replaces match and mismatch of infile")
+    parser.add_argument("--gap-open", type=int, help="score of the first position of a gap, enables affine gaps together with --gap-extend")
+    parser.add_argument("--gap-extend", type=int, help="score of every further position of a gap")
+    parser.add_argument("--engine", choices=["iterative", "recursive", "tiled"], default="iterative", help="engine used to fill the score matrix, tiled fills tiles of the matrix in parallel (default: iterative)")
+    parser.add_argument("--tile", type=int, default=1024, help="rows and columns of a tile of the tiled engine (default: 1024)")
+    parser.add_argument("--score-only", action="store_true", help="only print the score and the end of the best alignment, uses linear memory")
+    parser.add_argument("--max-alignments", type=int, default=None, metavar="N", help="stop after N co-optimal alignments, 0 means all of them (default: all, " + str(BATCH_MAX_ALIGNMENTS) + " per pair in batch mode and per hit in search mode)")
+    parser.add_argument("--linear", action="store_true", help="only print one optimal alignment, computed in linear memory (hirschberg)")
+    parser.add_argument("--band", type=parseBand, metavar="W", help="only compute cells within W of the diagonal (nw and ef), W can be 'auto' to derive it from the length difference. prints one optimal alignment")
+    parser.add_argument("--band-check", action="store_true", help="double the band while an alignment leaving it could score higher, so the result is exact")
+    parser.add_argument("--scratch", metavar="DIR", help="keep the score, path and backtrace matrices in memory mapped temporary files in DIR")
+    parser.add_argument("--seed", type=int, metavar="K", help="smith waterman seed and extend: extend every exact match of K residues with a gapped x-drop alignment instead of filling the whole matrix. prints the best hits")
+    parser.add_argument("--xdrop", type=int, default=20, metavar="X", help="stop extending a seed once its score is X below the best one (default: 20)")
+    parser.add_argument("--format", choices=["spreadsheet", "alignment", "cigar", "sam"], default="spreadsheet", help="output format (default: spreadsheet, which includes both matrices)")
+    parser.add_argument("--matrix-window", type=parseWindow, metavar="R0:R1,C0:C1", help="only print rows R0 to R1-1 and columns C0 to C1-1 of the matrices")
+    parser.add_argument("--batch", metavar="PAIRS", help="align every pair of a FASTA pair list or TSV file with the scores of infile, prints one tab separated line per pair: name, score, end point (position in the first, then in the second sequence) and the alignments")
+    parser.add_argument("--batch-format", choices=["auto", "fasta", "tsv"], default="auto", help="format of the pair file (default: auto)")
+    parser.add_argument("--workers", type=int, default=None, help="number of worker processes in batch mode and of the tiled engine (default: number of cpus)")
+    parser.add_argument("--chunksize", type=int, default=64, help="pairs per task in batch mode (default: 64)")
+    parser.add_argument("--search", metavar="DB", help="search the first sequence of infile against every sequence of a FASTA database with smith waterman")
+    parser.add_argument("--top", type=int, default=10, help="number of hits reported in search mode (default: 10)")
+    parser.add_argument("--lanes", type=int, default=64, help="database sequences scored at once in search mode (default: 64)")
+    parser.add_argument("--order", choices=["input", "completion"], default="input", help="order of the batch results (default: input)")
+    parser.add_argument("--cache", metavar="FILE", help="reuse the results of earlier runs from the SQLite database FILE and store new ones there. the matrices are not cached, so it needs an output format without them")
+    parser.add_argument("--cache-size", type=int, default=256, metavar="MIB", help="size of the cached results, the least recently used ones are evicted (default: 256)")
+    parser.add_argument("--cache-stats", action="store_true", help="print the hits, misses, evictions and the size of the cache to stderr")
+    parser.add_argument("--profile", action="store_true", help="print the time of every phase (parse, init, fill, traceback, output) and the counters (cells, alignments, bytes) of a single alignment to stderr")
+    args = parser.parse_args()
+    if(args.workers is not None and args.workers < 1):
+        parser.error("--workers has to be at least 1")
+    if(args.chunksize < 1):
+        parser.error("--chunksize has to be at least 1")
+    if(args.tile < 1):
+        parser.error("--tile has to be at least 1")
+    if(args.seed is not None and args.seed < 1):
+        parser.error("--seed has to be at least 1")
+    if(args.xdrop < 0):
+        parser.error("--xdrop has to be at least 0")
+    if((args.gap_open is None) != (args.gap_extend is None)):
+        parser.error("--gap-open and --gap-extend have to be given together")
+    conf = config(args.infile, sequences=args.batch is None and args.search is None, matrix=args.matrix,
+                  gapOpen=args.gap_open, gapExtend=args.gap_extend)   # create config object (parses config file)
+    conf.engine = args.engine
+    conf.tile = args.tile
+    conf.workers = args.workers
+    conf.scoreOnly = args.score_only
+    conf.linear = args.linear
+    conf.maxAlignments = args.max_alignments if args.max_alignments is not None else 0
+    if(args.scratch is not None):
+        conf.scratch = args.scratch
+    if(args.band is not None):
+        conf.band = args.band
+    conf.bandCheck = args.band_check
+    conf.seed = args.seed
+    conf.xDrop = args.xdrop
+    if(args.profile and (args.batch is not None or args.search is not None)):
+        parser.error("--profile only measures a single alignment, it can not be combined with --batch or --search")
+    conf.profile = args.profile
+    if(args.cache is not None):
+        if(args.batch is None and args.search is None and args.format == "spreadsheet" and not (conf.scoreOnly or conf.linear or conf.band is not None or conf.seed is not None)):
+            parser.error("--cache keeps no matrices, use --format alignment, cigar or sam")
+        conf.cache = args.cache
+        conf.cacheSize = args.cache_size * 2**20
+    elif(args.cache_stats):
+        parser.error("--cache-stats needs --cache")
+    if(args.batch is not None):
+        maxAlignments = args.max_alignments if args.max_alignments is not None else BATCH_MAX_ALIGNMENTS
+        batch(conf, args.batch, args.batch_format, maxAlignments).run(args.outfile, args.workers, args.chunksize, args.order)
+        if(args.cache_stats):
+            openCache(conf.cache, conf.cacheSize).printStats()  # the totals include the workers
+        sys.exit(0)
+    if(args.search is not None):
+        maxAlignments = args.max_alignments if args.max_alignments is not None else BATCH_MAX_ALIGNMENTS
+        db = search(conf, args.search, args.top, args.lanes, maxAlignments)
+        db.run()
+        db.printHits(args.outfile)
+        if(args.cache_stats):
+            openCache(conf.cache, conf.cacheSize).printStats()
+        sys.exit(0)
+    align = aligner(conf)                # create aligner. this will start the alignment based on the provided configs
+    if(conf.scoreOnly):
+        align.printScore(args.outfile)               # print score and end point
+    elif(args.format == "cigar"):
+        align.printCigar(args.outfile)               # one CIGAR line per alignment
+    elif(args.format == "sam"):
+        align.printSam(args.outfile)                 # one SAM record per alignment
+    elif(args.format == "alignment" or conf.linear or conf.band is not None or conf.seed is not None):
+        align.printAlignments(args.outfile)          # print the alignment, there are no matrices
+    else:
+        align.printSpreadSheet(args.outfile, args.matrix_window) # print out neat little spread sheet 
+    if(conf.profile):
+        align.printStats()                           # phase times and counters to stderr
+    if(args.cache_stats):
+        openCache(conf.cache, conf.cacheSize).printStats()
@@ -0,0 +1,74 @@
+#!/usr/bin/env python
+
+#imports
+import os          # for removing the temporary config
+import tempfile    # for the temporary config
+import unittest
+import numpy as np
+import pylignments # the aligner under test
+
+ALGORITHMS = ["nw", "sw", "ef"]
+# fixed pairs in the order of the config file: unrelated, near-identical, repeats with many co-optimal paths and an empty sequence
+PAIRS = [("AGCATGT", "CGCAATGA"),
+         ("GATTACAGATTACA", "GATTTACAGATACA"),
+         ("ACACACAC", "CACA"),
+         ("TTGACCA", "GGACT"),
+         ("ACGT", "")]
+
+class alignerTest(unittest.TestCase):
+    """Compares the engines and modes of the aligner, which have to give the same scores, end points and alignments"""
+    @classmethod
+    def setUpClass(cls):
+        # the scores are read from a config without sequences, like the batch mode does
+        handle, cls.configPath = tempfile.mkstemp(suffix=".txt")
+        os.write(handle, b"alg: nw\nmatch: +5\nmismatch: -2\nindel: -6\n")
+        os.close(handle)
+
+    @classmethod
+    def tearDownClass(cls):
+        os.remove(cls.configPath)
+
+    def align(self, seq1, seq2, algorithm, **settings):
+        # aligner of one pair, settings are set on the config
+        conf = pylignments.config(self.configPath, sequences=False).forPair(seq1, seq2)
+        conf.algorithm = algorithm
+        for name, value in settings.items():
+            setattr(conf, name, value)
+        return pylignments.aligner(conf)
+
+    def testEngines(self):
+        # the recursive and the tiled engine fill the same matrices and find the same alignments in the same order
+        for seq1, seq2 in PAIRS:
+            for algorithm in ALGORITHMS:
+                with self.subTest(seq1=seq1, seq2=seq2, algorithm=algorithm):
+                    iterative = self.align(seq1, seq2, algorithm)
+                    for other in (self.align(seq1, seq2, algorithm, engine="recursive"),
+                                  self.align(seq1, seq2, algorithm, engine="tiled", tile=2, workers=2)):
+                        np.testing.assert_array_equal(other.scores, iterative.scores)
+                        np.testing.assert_array_equal(other.path, iterative.path)
+                        self.assertEqual(other.score, iterative.score)
+                        self.assertEqual(other.sequences, iterative.sequences)
+
+    def testScoreOnly(self):
+        # score only finds the score and the first end point of the backtrace
+        for seq1, seq2 in PAIRS:
+            for algorithm in ALGORITHMS:
+                with self.subTest(seq1=seq1, seq2=seq2, algorithm=algorithm):
+                    full = self.align(seq1, seq2, algorithm)
+                    scoreOnly = self.align(seq1, seq2, algorithm, scoreOnly=True)
+                    self.assertEqual(scoreOnly.score, full.score)
+                    self.assertEqual(scoreOnly.end, full.ends[0])
+
+    def testBanded(self):
+        # a checked band gives the score of the full matrix, even if it starts too narrow
+        for seq1, seq2 in PAIRS:
+            for algorithm in ("nw", "ef"):
+                with self.subTest(seq1=seq1, seq2=seq2, algorithm=algorithm):
+                    full = self.align(seq1, seq2, algorithm)
+                    banded = self.align(seq1, seq2, algorithm, band=0, bandCheck=True)
+                    self.assertEqual(banded.score, full.score)
+                    self.assertEqual(len(banded.sequences), 1)
+
+#main
+if __name__ == "__main__":
+    unittest.main()